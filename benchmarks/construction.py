@@ -0,0 +1,75 @@
+'''
+Benchmark of DataSet construction.
+Reports time, peak memory (traced by tracemalloc) and steady-state memory of DataSet (frame and series)
+created with synthetic VK export.
+
+Usage:
+    python benchmarks/construction.py [days] [cities]
+'''
+
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+import numpy as np
+
+from vkvisualization.dataset import DataSet, AGES, GENDERS
+
+
+def make_export(days:int, cities:int, seed:int=0) -> pd.DataFrame:
+    '''
+    Returns DataFrame in VK export format with random values.
+    Parameters:
+        - days:int - number of days;
+        - cities:int - number of cities;
+        - seed:int - seed of random values;
+    '''
+
+    # (Критерий, Парам. №1, Парам. №2) keys of export
+    keys = [('views', None, None), ('visitors', None, None), ('reach', None, None),
+            ('reach_subscribers', None, None), ('reach_viral', None, None), ('reach_ads', None, None)]
+    keys += [('age', age, None) for age in AGES]
+    keys += [('gender', gender, None) for gender in GENDERS]
+    keys += [('gender_age', gender, age) for gender in GENDERS for age in AGES]
+    keys += [('cities', f'Город {number}', None) for number in range(cities)]
+    keys += [('feedback', param, None) for param in ('Нравится', 'Комментарии', 'Рассказали друзьям')]
+    keys += [('members', param, None) for param in ('Новые участники', 'Вышедшие участники')]
+
+    dates = pd.date_range('2018-01-01', periods=days).strftime('%Y-%m-%d').values
+    criterions, params1, params2 = (np.array(column, dtype=object) for column in zip(*keys))
+
+    # rows of every day are together as in VK export
+    return pd.DataFrame({'Дата': np.repeat(dates, len(keys)),
+                         'Критерий': np.tile(criterions, days),
+                         'Парам. №1': np.tile(params1, days),
+                         'Парам. №2': np.tile(params2, days),
+                         'Значение': np.random.default_rng(seed).integers(0, 10000, size=days * len(keys))})
+
+
+def main(days:int=730, cities:int=1000) -> None:
+
+    export = make_export(days, cities)
+    print(f'export: {len(export)} rows, {export.memory_usage(deep=True).sum() / 2 ** 20:.1f} MiB')
+
+    tracemalloc.start()
+    begin = time.perf_counter()
+
+    dataset = DataSet(export)
+
+    elapsed = time.perf_counter() - begin
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'construction: {elapsed:.2f} s, peak {peak / 2 ** 20:.1f} MiB')
+    # DataSet keeps both the frame and date-sorted series of every key
+    frame = dataset.memory_usage(deep=True).sum()
+    series_index = dataset._series_index
+    series = sum(dates.nbytes + values.nbytes for dates, values in (series_index.get(*key) for key in series_index.keys()))
+
+    print(f'steady state: {(frame + series) / 2 ** 20:.1f} MiB (frame {frame / 2 ** 20:.1f} MiB, series {series / 2 ** 20:.1f} MiB)')
+    print(dataset.dtypes.to_string())
+
+
+if __name__ == '__main__':
+    main(*(int(argument) for argument in sys.argv[1:3]))
\ No newline at end of file
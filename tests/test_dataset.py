@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from vkvisualization.dataset import DataSet
+
+
+def make_export(values:dict, days:int=10) -> pd.DataFrame:
+    '''Returns DataFrame in VK export format with (criterion, param1) keys and lists of float values.'''
+
+    dates = pd.date_range('2020-01-01', periods=days).strftime('%Y-%m-%d')
+    rows = [(date, criterion, param1, np.nan, value)
+            for (criterion, param1), series in values.items() for date, value in zip(dates, series)]
+
+    return pd.DataFrame(rows, columns=['Дата', 'Критерий', 'Парам. №1', 'Парам. №2', 'Значение'])
+
+
+def test_total_and_mean_skip_missing_values():
+    views = [1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+    dataset = DataSet(make_export({('views', np.nan): views}))
+
+    assert dataset.total('views', start='2020-01-01', end='2020-01-10') == np.nansum(views)
+    assert dataset.mean('views', start='2020-01-01', end='2020-01-10') == np.nanmean(views)
+
+    # ranges after the gap are not spoiled by it
+    assert dataset.total('views', start='2020-01-05', end='2020-01-07') == 18.0
+    assert dataset.mean('views', start='2020-01-02', end='2020-01-04') == 3.0
+    assert np.isnan(dataset.mean('views', start='2020-01-03', end='2020-01-03 12:00'))
+
+
+def test_top_cities_skip_missing_values():
+    export = make_export({('cities', 'Москва'): [10.0, np.nan, 10.0],
+                          ('cities', 'Казань'): [5.0, 5.0, 5.0],
+                          ('cities', 'Омск'): [np.nan, np.nan, np.nan],
+                          ('views', np.nan): [20.0, 20.0, 20.0]}, days=3)
+    dataset = DataSet(export)
+
+    cities, values = dataset.top_cities(k=2, start='2020-01-01', end='2020-01-03')
+    assert cities == ['Москва', 'Казань']
+    assert np.array_equal(values, [20.0, 15.0])
+
+    cities, values = dataset.top_cities(k=3, start='2020-01-01', end='2020-01-03', agg='mean')
+    assert cities == ['Москва', 'Казань', 'Омск']
+    assert np.array_equal(values, [10.0, 5.0, np.nan], equal_nan=True)
+
+
+def test_windows_skip_missing_values():
+    views = [1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0, 8.0, np.nan, 10.0]
+    dataset = DataSet(make_export({('views', np.nan): views}))
+    starts = pd.to_datetime(['2020-01-01', '2020-01-03', '2020-01-05', '2020-01-09'])
+    ends = pd.to_datetime(['2020-01-02', '2020-01-04', '2020-01-08', '2020-01-09 12:00'], format='ISO8601')
+
+    assert np.array_equal(dataset.windows('views', starts, ends, agg='sum'), [3.0, 4.0, 26.0, 0.0])
+    assert np.array_equal(dataset.windows('views', starts, ends, agg='mean'), [1.5, 4.0, 6.5, np.nan], equal_nan=True)
+    assert np.array_equal(dataset.windows('views', starts, ends, agg='min'), [1.0, 4.0, 5.0, np.nan], equal_nan=True)
+    assert np.array_equal(dataset.windows('views', starts, ends, agg='max'), [2.0, 4.0, 8.0, np.nan], equal_nan=True)
+
+
+def test_chunked_csv_stores_compact_values(tmp_path):
+    path = str(tmp_path / 'export.csv')
+    make_export({('views', np.nan): range(10), ('reach', np.nan): range(10)}).astype({'Значение': np.int64}).to_csv(path, index=False)
+
+    dataset = DataSet.from_csv(path, chunksize=7)
+
+    assert dataset['Значение'].dtype == np.int32
+    assert dataset.views().dtype == np.int64
+    assert np.array_equal(dataset['Значение'].values, DataSet.from_csv(path)['Значение'].values)
+
+
+def test_append_export_matches_dataset_of_merged_exports():
+    views, likes = np.arange(30.0), np.arange(30.0) * 2
+    export = make_export({('views', np.nan): views, ('feedback', 'Нравится'): likes}, days=30)
+    dates = export['Дата'].unique()
+    dataset = DataSet(export[export['Дата'] < dates[20]])
+    held = dataset.views()
+
+    # daily exports overlapping the previous day and export with revised values
+    for day in range(20, 30):
+        dataset.append_export(export[export['Дата'].isin(dates[day - 1:day + 1])])
+    revised = export[export['Дата'] >= dates[27]].assign(Значение=-1.0)
+    dataset.append_export(revised)
+
+    expected = DataSet(pd.concat([export[export['Дата'] < dates[27]], revised]))
+    assert dataset.end_date() == expected.end_date()
+    assert np.array_equal(dataset.views(), expected.views())
+    assert np.array_equal(dataset.likes(), expected.likes())
+    assert dataset.sort_values(['Дата', 'Критерий']).astype(str).reset_index(drop=True).equals(
+           expected.sort_values(['Дата', 'Критерий']).astype(str).reset_index(drop=True))
+
+    # arrays returned before append are not changed
+    assert np.array_equal(held, views[:20])
+
+
+def test_append_export_writes_rows_in_place():
+    export = make_export({('views', np.nan): np.arange(30.0)}, days=30)
+    dataset = DataSet(export.iloc[:10])
+    dataset.append_export(export.iloc[10:11])
+    values = dataset['Значение'].values
+
+    # rows fit to spare capacity, so they are written after rows of the previous DataFrame
+    dataset.append_export(export.iloc[11:12])
+    assert np.shares_memory(values, dataset['Значение'].values)
+    assert np.array_equal(dataset['Значение'].values, np.arange(12.0))
+
+
+def test_append_export_keeps_start_at_first_views_date():
+    export = make_export({('views', np.nan): np.arange(10.0)}, days=10).iloc[5:]
+    dataset = DataSet(export)
+
+    # rows before the first views date are dropped as by DataSet.__init__()
+    reach = make_export({('reach', np.nan): np.arange(10.0)}, days=10)
+    dataset.append_export(reach)
+    assert dataset.start_date() == pd.Timestamp('2020-01-06')
+    assert dataset['Дата'].min() == pd.Timestamp('2020-01-06')
+
+    dataset.append_export(make_export({('views', np.nan): np.arange(10.0)}, days=10).iloc[:3])
+    assert dataset.start_date() == pd.Timestamp('2020-01-01')
+    assert np.array_equal(dataset.reach(start='2020-01-01', end='2020-01-10'), np.arange(5.0, 10.0))
+
+
+def test_matrix_is_contiguous():
+    dataset = DataSet(make_export({('views', np.nan): np.arange(10.0), ('reach', np.nan): np.arange(10.0) * 2}))
+
+    dates, matrix = dataset.matrix(['views', 'reach'])
+    assert matrix.flags.c_contiguous and not matrix.flags.writeable
+
+    dates, matrix = dataset.matrix(['views', 'reach'], start='2020-01-03', end='2020-01-05')
+    assert matrix.flags.c_contiguous
+    assert np.array_equal(matrix, [[2.0, 3.0, 4.0], [4.0, 6.0, 8.0]])
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vkvisualization.index import SeriesIndex, downcast
+
+
+def reference_frame(series_index:SeriesIndex) -> pd.DataFrame:
+    '''Returns rows of all series ordered by stable argsort of dates with compact Значение column.'''
+
+    columns = series_index.to_columns()
+    order = np.argsort(columns['Дата'], kind='stable')
+    columns = {column: values[order] for column, values in columns.items()}
+    columns['Значение'] = downcast(columns['Значение'])
+
+    return pd.DataFrame(columns)
+
+
+@pytest.mark.parametrize('freq', ['D', '6h'])
+def test_to_frame_matches_reference(freq):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2020-01-01', periods=40, freq=freq).values.astype('datetime64[ns]')
+
+    # series with gaps, different starts and repeated days
+    series = {}
+    for number in range(20):
+        series_dates = np.sort(rng.choice(dates, size=int(rng.integers(1, 30))))
+        series[('cities', f'Город {number}', None)] = (series_dates, rng.integers(0, 100, size=len(series_dates)))
+    series[('views', None, None)] = (dates, np.arange(len(dates)))
+    series_index = SeriesIndex(series)
+
+    pd.testing.assert_frame_equal(series_index.to_frame(), reference_frame(series_index))
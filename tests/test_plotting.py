@@ -0,0 +1,123 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import numpy as np
+import pytest
+
+from vkvisualization.dataset import DataSet
+from vkvisualization.plotting import PlotHandle, downsample, visualize_discussions, visualize_views
+
+
+def reference_lttb(x, y, max_points:int) -> np.ndarray:
+    '''Returns indices of points selected with straightforward Largest-Triangle-Three-Buckets loop.'''
+
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, len(y) - 1, max_points - 1).astype(np.int64)
+
+    selected, previous = [0], 0
+    for bucket in range(max_points - 2):
+        left, right = edges[bucket], edges[bucket + 1]
+
+        # the third vertex is mean of the next bucket (the last point for the last bucket)
+        if bucket + 2 < len(edges):
+            x_next = x[right:edges[bucket + 2]].mean()
+            y_next = y[right:edges[bucket + 2]].mean()
+        else:
+            x_next, y_next = x[-1], y[-1]
+
+        best, best_area = left, -1.0
+        for point in range(left, right):
+            area = abs((x[previous] - x_next) * (y[point] - y[previous]) - (x[previous] - x[point]) * (y_next - y[previous]))
+            if area > best_area:
+                best, best_area = point, area
+
+        selected.append(best)
+        previous = best
+
+    selected.append(len(y) - 1)
+
+    return np.array(selected)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_downsample_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    length = int(rng.integers(50, 2000))
+    max_points = int(rng.integers(3, 50))
+    x = np.arange(length)
+    y = rng.normal(size=length).cumsum()
+
+    x_sampled, y_sampled = downsample(x, y, max_points)
+    expected = reference_lttb(x, y, max_points)
+
+    assert np.array_equal(x_sampled, x[expected])
+    assert np.array_equal(y_sampled, y[expected])
+
+
+def test_downsample_keeps_short_series():
+    x, y = range(5), [1, 2, 3, 4, 5]
+
+    assert downsample(x, y, 10) == (x, y)
+    assert downsample(x, y, None) == (x, y)
+
+
+def test_downsample_keeps_peak():
+    y = np.zeros(10000)
+    y[4321] = 100.0
+
+    x_sampled, y_sampled = downsample(np.arange(len(y)), y, 100)
+
+    assert len(x_sampled) == 100
+    assert 4321 in x_sampled
+
+
+@pytest.mark.parametrize('max_points', [2, 0, 3.5])
+def test_downsample_rejects_invalid_max_points(max_points):
+    with pytest.raises(ValueError):
+        downsample(np.arange(10), np.arange(10), max_points)
+
+def test_visualize_draws_missing_series_empty():
+    # export without sections
+    dates = pd.date_range('2020-01-01', periods=5).strftime('%Y-%m-%d')
+    dataset = DataSet(pd.DataFrame({'Дата': dates, 'Критерий': 'views', 'Парам. №1': np.nan, 'Парам. №2': np.nan, 'Значение': range(5)}))
+
+    figure, ax = plt.subplots()
+    visualize_discussions(dataset)(ax)
+    visualize_views(dataset)(ax)
+
+    assert [len(line.get_xdata()) for line in ax.lines] == [0, 5]
+    plt.close(figure)
+
+
+
+def artist_colors(artists:list) -> set:
+    '''Returns set with hex colors of lines, bars and collections of bars.'''
+
+    colors = set()
+    for artist in artists:
+        if hasattr(artist, 'get_color') and not hasattr(artist, 'get_paths'):
+            colors.add(matplotlib.colors.to_hex(artist.get_color()))
+        else:
+            colors.update(matplotlib.colors.to_hex(color) for color in np.atleast_2d(artist.get_facecolor()))
+
+    return colors
+
+
+@pytest.mark.parametrize('kind', ['plot', 'hist', 'bar', 'barh', 'fastbar'])
+def test_update_keeps_color(kind):
+    dates = pd.date_range('2020-01-01', periods=10)
+    dataset = DataSet(pd.DataFrame({'Дата': dates.strftime('%Y-%m-%d'), 'Критерий': 'views',
+                                    'Парам. №1': np.nan, 'Парам. №2': np.nan, 'Значение': range(10)}))
+
+    # plot of the first 5 days gets 5 newer days with update(), the line is downsampled and drawn again
+    figure, ax = plt.subplots()
+    max_points = 3 if kind == 'plot' else None
+    handle = PlotHandle(ax, kind, range(5), dataset.views(end='2020-01-05'), 'views', {}, dates.values[4], max_points, {})
+    colors = artist_colors(handle.artists)
+    ax.plot([0, 1], [0, 1])
+
+    assert handle.update(dataset) == 5
+    assert artist_colors(handle.artists) == colors
+    plt.close(figure)
\ No newline at end of file
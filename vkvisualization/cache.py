@@ -0,0 +1,154 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from vkvisualization.index import SeriesIndex
+
+
+# version of .npz cache format, caches with other versions are stale
+VERSION = 1
+
+
+def cache_path(path:str) -> str:
+    '''Returns path of .npz sidecar cache for source file.'''
+    return path + '.cache.npz'
+
+
+def load(path:str, options:dict) -> SeriesIndex:
+    '''
+    Returns SeriesIndex object from sidecar cache of source file or None if cache is missing or stale.
+    Parameters:
+        - path:str - source file's path;
+        - options:dict - parameters of reading function, cache is stale if they were changed;
+    '''
+
+    try:
+        with np.load(cache_path(path), allow_pickle=False) as cache:
+
+            # cache of other format version or source read with other options
+            if int(cache['version']) != VERSION or str(cache['options']) != _options_key(options):
+                return None
+
+            stat = os.stat(path)
+
+            # if size or mtime were changed, the content hash decides
+            if int(cache['size']) != stat.st_size:
+                return None
+
+            arrays = None
+            if int(cache['mtime']) != stat.st_mtime_ns:
+                if str(cache['hash']) != _content_hash(path):
+                    return None
+
+                # unchanged source with new mtime (like downloaded again), cache is rewritten with new mtime,
+                # so the source is not hashed by every load
+                arrays = {name: cache[name] for name in cache.files}
+                arrays['mtime'] = np.array(stat.st_mtime_ns)
+
+            series_index = _unpack(cache)
+
+    except (OSError, KeyError, ValueError):
+        return None
+
+    # cache is optional, so series are returned even if cache cannot be rewritten
+    if arrays is not None:
+        try:
+            _write(path, arrays)
+        except OSError:
+            pass
+
+    return series_index
+
+
+def save(path:str, options:dict, series_index:SeriesIndex) -> None:
+    '''
+    Writes SeriesIndex object to sidecar cache of source file.
+    Parameters:
+        - path:str - source file's path;
+        - options:dict - parameters of reading function;
+        - series_index:SeriesIndex - parsed and normalized series of source file;
+    '''
+
+    stat = os.stat(path)
+
+    _write(path, dict(version=np.array(VERSION),
+                      options=np.array(_options_key(options)),
+                      size=np.array(stat.st_size),
+                      mtime=np.array(stat.st_mtime_ns),
+                      hash=np.array(_content_hash(path)),
+                      **_pack(series_index)))
+
+
+def _write(path:str, arrays:dict) -> None:
+    '''Writes arrays to sidecar cache of source file.'''
+
+    # writing to temporary file first, so readers never see partially written cache
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(suffix='.npz', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temporary, cache_path(path))
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _options_key(options:dict) -> str:
+    '''Returns str representation of reading function's parameters.'''
+    return repr(sorted(options.items()))
+
+
+def _content_hash(path:str) -> str:
+    '''Returns sha256 hash of file's content.'''
+
+    content_hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            content_hash.update(block)
+
+    return content_hash.hexdigest()
+
+
+def _pack(series_index:SeriesIndex) -> dict:
+    '''Returns dict with np.ndarray representation of SeriesIndex object.'''
+
+    keys = series_index.keys()
+    series = [series_index.get(*key) for key in keys]
+
+    arrays = {'lengths': np.array([len(dates) for dates, _ in series], dtype=np.int64),
+              'dates': np.concatenate([dates for dates, _ in series] or [np.empty(0, dtype='datetime64[ns]')]).astype('datetime64[ns]'),
+              'values': np.concatenate([values for _, values in series] or [np.empty(0)])}
+
+    # object values cannot be stored without pickle
+    if arrays['values'].dtype == object:
+        arrays['values'] = arrays['values'].astype(np.float64)
+
+    # key columns with mask for missing params
+    for position in range(3):
+        arrays[f'key{position}'] = np.array(['' if key[position] is None else key[position] for key in keys], dtype=str)
+        arrays[f'missing{position}'] = np.array([key[position] is None for key in keys], dtype=bool)
+
+    return arrays
+
+
+def _unpack(cache) -> SeriesIndex:
+    '''Returns SeriesIndex object from np.ndarray representation.'''
+
+    dates, values = cache['dates'], cache['values']
+    bounds = np.concatenate(([0], np.cumsum(cache['lengths'])))
+
+    # series are returned as views, so they must not be changed by callers
+    dates.flags.writeable = False
+    values.flags.writeable = False
+
+    columns = [[None if missing else str(param) for param, missing in zip(cache[f'key{position}'], cache[f'missing{position}'])]
+               for position in range(3)]
+
+    series = {}
+    for number, key in enumerate(zip(*columns)):
+        series[key] = (dates[bounds[number]:bounds[number + 1]], values[bounds[number]:bounds[number + 1]])
+
+    return SeriesIndex(series)
@@ -0,0 +1,200 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vkvisualization.dataset import DataSet
+from vkvisualization.index import SeriesIndex
+
+
+class DataSetCollection:
+    '''
+    Collection of VK groups' data.
+    Every group is kept as compact date-sorted series, so groups are not concatenated to one DataFrame.
+    '''
+
+    def __init__(self, datasets:dict) -> None:
+
+        # dict with group names and SeriesIndex objects
+        self._groups = {}
+
+        # dict with group names and DataSet objects built by __getitem__()
+        self._datasets = {}
+
+        for name, dataset in datasets.items():
+            if isinstance(dataset, DataSet):
+                self._groups[name] = dataset._series_index
+                self._datasets[name] = dataset
+            elif isinstance(dataset, SeriesIndex):
+                self._groups[name] = dataset
+            else:
+                raise TypeError(f'Group {name} has to be DataSet or SeriesIndex (found {type(dataset)} type).')
+
+        # first and last dates of every series
+        firsts, lasts = [], []
+        for series_index in self._groups.values():
+            for key in series_index.keys():
+                dates, _ = series_index.get(*key)
+                firsts.append(dates[0])
+                lasts.append(dates[-1])
+
+        # start date
+        self.__start = min(firsts, default=None)
+
+        # end date
+        self.__end = max(lasts, default=None)
+
+
+    @classmethod
+    def from_directory(cls, path:str, workers:int=None, cache:bool=False, **kwargs):
+        '''
+        Creating DataSetCollection object with all .xls and .csv files in directory.
+        Files are loaded in parallel, name of every group is file's name without extension.
+        Parameters:
+            - path:str - directory's path;
+            - workers:int - number of processes loading files (os.cpu_count() if None);
+            - cache:bool - parameter for DataSet.from_excel() and DataSet.from_csv();
+            - **kwargs - filters of DataSet.from_excel() and DataSet.from_csv() (like criteria or start)
+              and parameters for pd.read_excel() or pd.read_csv();
+        '''
+
+        # if input path is not directory
+        if not os.path.isdir(path):
+            raise ValueError(f'Input path is not directory ({path}).')
+
+        # preprocessing workers argument
+        if workers is not None and (not isinstance(workers, int) or workers <= 0):
+            raise ValueError(f'Argument workers has to be positive integer (found {workers}).')
+
+        paths = {}
+        for filename in sorted(os.listdir(path)):
+            name, file_extension = os.path.splitext(filename)
+            if file_extension in ('.xls', '.csv'):
+                paths[name] = os.path.join(path, filename)
+
+        # loading files in one process
+        if workers == 1 or len(paths) <= 1:
+            return cls({name: _load(file_path, cache, kwargs) for name, file_path in paths.items()})
+
+        # loading files with process pool, only compact series are sent back
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(_load, file_path, cache, kwargs) for name, file_path in paths.items()}
+            return cls({name: future.result() for name, future in futures.items()})
+
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+
+    def __getitem__(self, name:str) -> DataSet:
+        '''
+        Returns DataSet object of group. 
+        DataSet of group loaded as series is built with all its rows by the first call and is returned by next calls.
+        '''
+
+        try:
+            series_index = self._groups[name]
+        except KeyError:
+            raise KeyError(f'Unknown group: {name}. Use DataSetCollection.names() to check available groups.')
+
+        if name not in self._datasets:
+            self._datasets[name] = DataSet(series_index=series_index)
+
+        return self._datasets[name]
+
+
+    def names(self) -> list:
+        '''Returns list with names of groups.'''
+        return list(self._groups)
+
+
+    def start_date(self):
+        '''Returns minimum date in all groups'''
+        return self.__start
+
+
+    def end_date(self):
+        '''Returns maximum date in all groups'''
+        return self.__end
+
+
+    def stack(self, spec, start=None, end=None, fill=0) -> tuple:
+        '''
+        Returns (dates, values) tuple, where values is 2D np.ndarray with one row for every group (in order of names()).
+        Parameters:
+            - spec - criterion (like 'reach') or (criterion, param1, param2) tuple (like ('feedback', 'Нравится'));
+            - start, end - the same as in DataSet methods, but valid dates are dates of all groups;
+            - fill - value for dates that are missing in group (or for all dates of groups without spec's series);
+        '''
+
+        # preprocessing spec argument
+        key = DataSet._preprocess_spec(spec)
+
+        # if there is no series for spec in any group
+        if not any(key + (None,) * (3 - len(key)) in series_index for series_index in self._groups.values()):
+            raise ValueError(f'Unknown spec: {spec}. There is no series with this criterion and params in any group.')
+
+        # preprocessing start argument
+        start = self._preprocess_date(start, 'Start', self.__start)
+
+        # preprocessing end argument
+        end = self._preprocess_date(end, 'End', self.__end)
+
+        # if start is greater than end
+        if start >= end:
+            raise ValueError('Start is greater than end or is equal to end.')
+
+        # date-range slices of every group
+        slices = []
+        for series_index in self._groups.values():
+            dates, values = series_index.get(*key)
+            left = np.searchsorted(dates, start, side='left')
+            right = np.searchsorted(dates, end, side='right')
+            slices.append((dates[left:right], values[left:right]))
+
+        # shared date axis of all groups
+        axis = np.unique(np.concatenate([dates for dates, _ in slices] or [np.empty(0, dtype='datetime64[ns]')]))
+
+        matrix = np.full((len(slices), len(axis)), fill, dtype=np.float64)
+        for row, (dates, values) in enumerate(slices):
+            matrix[row, np.searchsorted(axis, dates)] = values
+
+        return axis, matrix
+
+
+    def sum(self, spec, start=None, end=None) -> tuple:
+        '''
+        Returns (dates, values) tuple, where values is np.ndarray with sum of all groups for every date.
+        Parameters are the same as in DataSetCollection.stack().
+        '''
+
+        axis, matrix = self.stack(spec, start=start, end=end, fill=0)
+
+        return axis, matrix.sum(axis=0)
+
+
+    def _preprocess_date(self, date, name:str, default):
+        '''Preprocesses start or end date.'''
+
+        if date is None or (isinstance(date, str) and not date):
+            return default
+
+        # converting date to datetime
+        date = DataSet._to_datetime64(date, name)
+
+        # if date is out of valid dates
+        if date < self.__start or date > self.__end:
+            raise ValueError(f'{name} argument is out of valid dates ({date} vs. {str(self.__start)[:10]} - {str(self.__end)[:10]}).')
+
+        return date
+
+
+def _load(path:str, cache:bool, options:dict) -> SeriesIndex:
+    '''Returns SeriesIndex object of .xls or .csv file.'''
+
+    if path.endswith('.xls'):
+        dataset = DataSet.from_excel(path, cache=cache, **options)
+    else:
+        dataset = DataSet.from_csv(path, cache=cache, **options)
+
+    return dataset._series_index
@@ -1,25 +1,117 @@
+import datetime
 import os
 
 import pandas as pd
 import numpy as np
 
+from vkvisualization import cache as sidecar
+from vkvisualization import shared
+from vkvisualization.index import SeriesIndex, SeriesIndexBuilder, downcast, period_starts
+from vkvisualization.querycache import QueryCache, cached
+from vkvisualization.rows import RowBuffer
+
+
+# series keys of DataSet methods without key arguments
+METRICS = {'views': ('views',),
+           'visitors': ('visitors',),
+           'discussions': ('sections', 'Обсуждения'),
+           'audio': ('sections', 'Аудиозаписи'),
+           'videos': ('sections', 'Видеозаписи'),
+           'photo_albums': ('sections', 'Фотоальбомы'),
+           'likes': ('feedback', 'Нравится'),
+           'comments': ('feedback', 'Комментарии'),
+           'told_friends': ('feedback', 'Рассказали друзьям'),
+           'new_members': ('members', 'Новые участники'),
+           'exited_members': ('members', 'Вышедшие участники'),
+           'reach': ('reach',),
+           'reach_subscribers': ('reach_subscribers',),
+           'reach_viral': ('reach_viral',),
+           'reach_ads': ('reach_ads',)}
+
+# age buckets of VK export
+AGES = ['1-18', '18-21', '21-24', '24-27', '27-30', '30-35', '35-45', '45+']
+
+# genders of VK export
+GENDERS = ['М', 'Ж']
+
+# criterions and key arguments (with default values) of DataSet methods with key arguments
+KEYED_METRICS = {'age': ('age', {'key': '18-21'}),
+                 'gender': ('gender', {'key': 'Ж'}),
+                 'gender_age': ('gender_age', {'gender': 'Ж', 'age': '18-21'}),
+                 'city': ('cities', {'city': None}),
+                 'country': ('countries', {'country': None})}
+
+
+# criterions with rows of every city or country
+GEO_CRITERIA = ('cities', 'countries')
+
+# number of rows of .csv file read at once when rows are filtered while reading
+READ_CHUNKSIZE = 100000
+
 
 class DataSet(pd.DataFrame):
-    def __init__(self, *args) -> None:
 
-        # DataFrame sorted by date
-        df = pd.DataFrame(*args).sort_values('Дата')
+    # attributes of DataSet that are not columns
+    _metadata = ['_cities', '_countries', '_series_index', '_shared_memory', '_derived_cache', '_query_cache']
 
-        df = df[df['Дата'] >= df['Дата'][df['Критерий'] == 'views'].min()]
+    def __init__(self, *args, series_index:SeriesIndex=None) -> None:
 
-        # DataFrame.__init__() 
-        super(DataSet, self).__init__(df)
+        if series_index is None:
 
-        # converting Дата column to datetime
-        try:
-            self['Дата'] = pd.to_datetime(self['Дата'])
-        except Exception as ex:
-            raise ValueError(f'Error converting Дата column ({ex}).')
+            df = pd.DataFrame(*args)
+
+            # converting Дата column to datetime before sorting, so dates are compared as dates
+            try:
+                dates = pd.to_datetime(df['Дата']).values
+            except Exception as ex:
+                raise ValueError(f'Error converting Дата column ({ex}).')
+
+            # rows from the first views date (no rows if there are no views)
+            views = (df['Критерий'] == 'views').values
+            first = dates[views].min() if views.any() else None
+            rows = np.flatnonzero(dates >= first) if first is not None else np.empty(0, dtype=np.int64)
+
+            # VK exports are usually sorted by date already, so rows are sorted only if they are not
+            if np.any(dates[rows[1:]] < dates[rows[:-1]]):
+                rows = rows[np.argsort(dates[rows], kind='stable')]
+
+            # every column is taken by rows once, low-cardinality text columns are taken as integer codes
+            columns = {}
+            for column in df.columns:
+                if column == 'Дата':
+                    columns[column] = dates[rows]
+                elif column in ('Критерий', 'Парам. №1', 'Парам. №2'):
+                    categorical = pd.Categorical(df[column])
+                    columns[column] = pd.Categorical.from_codes(categorical.codes[rows], dtype=categorical.dtype)
+                elif column == 'Значение':
+                    columns[column] = downcast(df[column].values[rows])
+                else:
+                    columns[column] = df[column].values[rows]
+
+            # DataFrame.__init__() with taken columns without copying them again
+            super(DataSet, self).__init__(columns, index=pd.RangeIndex(len(rows)), copy=False)
+
+            # date-sorted series for every (Критерий, Парам. №1, Парам. №2) key
+            self._series_index = SeriesIndex.from_frame(self)
+
+        elif args:
+
+            # DataFrame.__init__() with DataFrame already normalized together with series
+            super(DataSet, self).__init__(*args)
+
+            self._series_index = series_index
+
+        else:
+
+            # dropping dates lower than the first views date
+            views_dates, _ = series_index.get('views')
+            if len(views_dates):
+                series_index = series_index.trim(views_dates[0])
+
+            # DataFrame.__init__() with already built series
+            super(DataSet, self).__init__(series_index.to_frame())
+
+            self._series_index = series_index
 
         # start date
         self.__start = np.datetime64(self['Дата'].min())
@@ -28,10 +120,37 @@ class DataSet(pd.DataFrame):
         self.__end = np.datetime64(self['Дата'].max()) 
 
         # available cities in DataSet
-        self._cities = self['Парам. №1'][self['Критерий'] == 'cities'].unique()
+        self._cities = self._series_index.params('cities')
 
         # available countries in DataSet
-        self._countries = self['Парам. №1'][self['Критерий'] == 'countries'].unique()
+        self._countries = self._series_index.params('countries')
+
+        # dict with rolling statistics and date-aligned matrices, cleared when data is changed
+        self._derived_cache = {}
+
+        # LRU cache of methods' results, disabled by default
+        self._query_cache = None
+
+
+    def enable_cache(self, max_size:int=128, max_bytes:int=None) -> None:
+        '''
+        Enables LRU cache of results of methods getting data (DataSet.views(), DataSet.city(), ...).
+        Cached results are read-only, cache is cleared when data is changed.
+        Parameters:
+            - max_size:int - maximum number of cached results;
+            - max_bytes:int - maximum size of cached results in bytes (not limited if None);
+        '''
+        self._query_cache = QueryCache(max_size=max_size, max_bytes=max_bytes)
+
+
+    def disable_cache(self) -> None:
+        '''Disables and drops cache of results.'''
+        self._query_cache = None
+
+
+    def cache_info(self) -> dict:
+        '''Returns dict with hits, misses, size, bytes, max_size and max_bytes of cache or None if cache is disabled.'''
+        return None if self._query_cache is None else self._query_cache.info()
 
 
     def start_date(self):
@@ -44,6 +163,7 @@ class DataSet(pd.DataFrame):
         return self.__end
 
 
+    @cached
     def views(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with views from start date to end date.'''
 
@@ -58,11 +178,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'views')].values
+        return self._select(start, end, 'views')
 
 
+    @cached
     def visitors(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with visitors from start date to end date.'''
 
@@ -77,15 +196,14 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                               (self['Дата'] >= start) & 
-                               (self['Критерий'] == 'visitors')].values
+        return self._select(start, end, 'visitors')
 
     
+    @cached
     def age(self, key='18-21', start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with age as key from start date to end date.'''
 
-        keys = ['1-18', '18-21', '21-24', '24-27', '27-30', '30-35', '35-45', '45+']
+        keys = AGES
 
         # preprocessing key argument
         if key not in keys:
@@ -102,17 +220,15 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'age') & 
-                                (self['Парам. №1'] == key)].values
+        return self._select(start, end, 'age', key)
 
 
+    @cached
     def gender(self, key='Ж', start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with gender as key from start date to end date.'''
 
         # preprocessing key argument
-        if key not in ('М', 'Ж'):
+        if key not in GENDERS:
             raise ValueError(f"Unknown key: {key}. Available keys are 'М', 'Ж'.")
 
         # preprocessing start argument
@@ -126,24 +242,22 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'gender') & 
-                                (self['Парам. №1'] == key)].values
+        return self._select(start, end, 'gender', key)
 
 
+    @cached
     def gender_age(self, gender='Ж', age='18-21', start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with gender and age as keys from start date to end date.'''
 
         # preprocessing gender argument
-        if gender not in ('М', 'Ж'):
-            raise ValueError(f"Unknown key: {g}. Available gender keys are 'М', 'Ж'.")
+        if gender not in GENDERS:
+            raise ValueError(f"Unknown key: {gender}. Available gender keys are 'М', 'Ж'.")
 
-        keys = ['1-18', '18-21', '21-24', '24-27', '27-30', '30-35', '35-45', '45+']
+        keys = AGES
 
         # preprocessing age argument
         if age not in keys:
-            raise ValueError(f'Unknown key: {a}. Available age keys are {keys}.')
+            raise ValueError(f'Unknown key: {age}. Available age keys are {keys}.')
 
         # preprocessing start argument
         start = self._preprocess_start(start)
@@ -156,18 +270,15 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'gender_age') & 
-                                (self['Парам. №1'] == g) &
-                                (self['Парам. №2'] == a)].values
+        return self._select(start, end, 'gender_age', gender, age)
 
 
+    @cached
     def city(self, city:str, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with city as key from start date to end date.'''
 
         # preprocessing city argument
-        if city not in self.__cities:
+        if city not in self._cities:
             raise ValueError(f"Unknown city: {city}. Use Dataset.available_cities() to check available cities.")
 
         # preprocessing start argument
@@ -181,23 +292,21 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'cities') & 
-                                (self['Парам. №1'] == city)].values
+        return self._select(start, end, 'cities', city)
 
 
     def available_cities(self) -> list:
         '''Returns list with available cities.'''
-        return list(self.__cities)
+        return list(self._cities)
 
     
+    @cached
     def country(self, country:str, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with country as key from start date to end date.'''
 
         # preprocessing country argument
-        if country not in self.__countries:
-            raise ValueError(f"Unknown city: {city}. Use Dataset.available_countries() to check available cities.")
+        if country not in self._countries:
+            raise ValueError(f"Unknown country: {country}. Use Dataset.available_countries() to check available countries.")
 
         # preprocessing start argument
         start = self._preprocess_start(start)
@@ -210,17 +319,15 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                 (self['Дата'] >= start) & 
-                                 (self['Критерий'] == 'countries') & 
-                                 (self['Парам. №1'] == country)].values 
+        return self._select(start, end, 'countries', country) 
 
 
     def available_countries(self) -> list:
         '''Returns list with available countries.'''
-        return list(self.__countries)   
+        return list(self._countries)   
 
 
+    @cached
     def discussions(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with discussions from start date to end date.'''
 
@@ -235,12 +342,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'sections') &
-                                (self['Парам. №1'] == 'Обсуждения')].values   
+        return self._select(start, end, 'sections', 'Обсуждения')   
 
 
+    @cached
     def audio(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with audio from start date to end date.'''
 
@@ -255,12 +360,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'sections') &
-                                (self['Парам. №1'] == 'Аудиозаписи')].values                                
+        return self._select(start, end, 'sections', 'Аудиозаписи')                                
     
 
+    @cached
     def videos(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with videos from start date to end date.'''
 
@@ -275,12 +378,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'sections') &
-                                (self['Парам. №1'] == 'Видеозаписи')].values
+        return self._select(start, end, 'sections', 'Видеозаписи')
 
     
+    @cached
     def photo_albums(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with photo albums from start date to end date.'''
 
@@ -295,12 +396,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'sections') &
-                                (self['Парам. №1'] == 'Фотоальбомы')].values
+        return self._select(start, end, 'sections', 'Фотоальбомы')
 
 
+    @cached
     def likes(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with likes from start date to end date.'''
 
@@ -315,12 +414,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'feedback') &
-                                (self['Парам. №1'] == 'Нравится')].values
+        return self._select(start, end, 'feedback', 'Нравится')
 
             
+    @cached
     def comments(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with comments from start date to end date.'''
 
@@ -335,12 +432,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'feedback') &
-                                (self['Парам. №1'] == 'Комментарии')].values
+        return self._select(start, end, 'feedback', 'Комментарии')
 
 
+    @cached
     def told_friends(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with "told friends" category from start date to end date.'''
 
@@ -355,12 +450,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'feedback') &
-                                (self['Парам. №1'] == 'Рассказали друзьям')].values
+        return self._select(start, end, 'feedback', 'Рассказали друзьям')
 
 
+    @cached
     def new_members(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with "new members" category from start date to end date.'''
 
@@ -375,12 +468,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'members') &
-                                (self['Парам. №1'] == 'Новые участники')].values    
+        return self._select(start, end, 'members', 'Новые участники')    
 
 
+    @cached
     def exited_members(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with "exited members" category from start date to end date.'''
 
@@ -395,12 +486,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'members') &
-                                (self['Парам. №1'] == 'Вышедшие участники')].values
+        return self._select(start, end, 'members', 'Вышедшие участники')
 
     
+    @cached
     def reach(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with reach from start date to end date.'''
 
@@ -415,11 +504,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'reach')].values
+        return self._select(start, end, 'reach')
 
     
+    @cached
     def reach_subscribers(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with reach subscribers from start date to end date.'''
 
@@ -434,11 +522,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'reach_subscribers')].values
+        return self._select(start, end, 'reach_subscribers')
 
 
+    @cached
     def reach_viral(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with "reach viral" category from start date to end date.'''
 
@@ -453,11 +540,10 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'reach_viral')].values
+        return self._select(start, end, 'reach_viral')
 
 
+    @cached
     def reach_ads(self, start=None, end=None) -> np.ndarray:
         '''Returns np.ndarray with "reach ads" category from start date to end date.'''
 
@@ -472,17 +558,390 @@ class DataSet(pd.DataFrame):
             raise ValueError('Start is greater than end or is equal to end.')
 
         # return np.ndarray
-        return self['Значение'][(self['Дата'] <= end) & 
-                                (self['Дата'] >= start) & 
-                                (self['Критерий'] == 'reach_ads')].values
+        return self._select(start, end, 'reach_ads')
+
+
+    def query_many(self, specs, start=None, end=None) -> dict:
+        '''
+        Returns dict with np.ndarray for every spec from start date to end date.
+        Parameters:
+            - specs - iterable of criterions (like 'views') or (criterion, param1, param2) tuples (like ('feedback', 'Нравится')),
+              ValueError is raised for specs without series;
+            - start, end - the same as in other methods, processed once for all specs;
+        '''
+
+        # preprocessing start argument
+        start = self._preprocess_start(start)
+
+        # preprocessing end argument
+        end = self._preprocess_end(end)
+
+        # if start is greater than end
+        if start >= end:
+            raise ValueError('Start is greater than end or is equal to end.')
+
+        result = {}
+        for spec in specs:
+
+            # preprocessing spec argument
+            key = self._preprocess_spec(spec)
+
+            # if there is no series for spec
+            if key + (None,) * (3 - len(key)) not in self._series_index:
+                raise ValueError(f'Unknown spec: {spec}. There is no series with this criterion and params in DataSet.')
+
+            result[spec] = self._select(start, end, *key)
+
+        return result
+
+
+    def total(self, metric:str, start=None, end=None, **keys):
+        '''
+        Returns sum of metric from start date to end date, missing values (np.nan) are skipped.
+        Sums are computed with prefix sums of series, so every call costs two binary searches.
+        Parameters:
+            - metric:str - name of DataSet method (like 'views', 'likes' or 'city');
+            - start, end - the same as in DataSet methods;
+            - **keys - key arguments of DataSet method (like city='Москва' for 'city');
+        '''
+
+        total, count = self._range_sum(metric, start, end, keys)
+
+        return total
+
+
+    def mean(self, metric:str, start=None, end=None, **keys) -> float:
+        '''
+        Returns mean of metric from start date to end date without missing values (np.nan if there are no values).
+        Parameters are the same as in DataSet.total().
+        '''
+
+        total, count = self._range_sum(metric, start, end, keys)
+
+        return total / count if count else np.nan
+
+
+    def resample(self, freq:str, metrics, agg:str='sum') -> tuple:
+        '''
+        Returns (periods, values) tuple, where periods is np.ndarray with first days of calendar periods 
+        from start date to end date and values is dict with np.ndarray of aggregated values for every metric.
+        Rollups of every series are cached, so repeated calls don't aggregate series again.
+        Parameters:
+            - freq:str - 'W' (weeks from Monday), 'M' (months), 'Q' (quarters) or 'Y' (years);
+            - metrics - iterable of names of DataSet methods (like 'views') or tuples with name
+              and key arguments of method in the same order (like ('city', 'Москва') or ('gender_age', 'М', '45+'));
+            - agg:str - 'sum', 'mean' or 'max', periods without values are 0 for 'sum' and np.nan for others;
+        '''
+
+        # all periods from start date to end date
+        days = np.arange(np.datetime64(self.__start, 'D'), np.datetime64(self.__end, 'D') + 1)
+        periods = np.unique(period_starts(days, freq))
+
+        result = {}
+        for metric in metrics:
+
+            # preprocessing metric argument
+            key = self._preprocess_metric_item(metric)
+
+            metric_periods, values = self._series_index.rollup(key, freq, agg)
+
+            result[metric] = np.full(len(periods), 0 if agg == 'sum' else np.nan, dtype=values.dtype)
+            result[metric][np.searchsorted(periods, metric_periods)] = values
+
+        return periods, result
+
+
+    def windows(self, metric, starts, ends, agg:str=None) -> np.ndarray:
+        '''
+        Returns metric's values for many windows from starts[i] to ends[i] at once.
+        Bounds of all windows are found with one vectorized binary search instead of a loop of queries.
+        Parameters:
+            - metric - name of DataSet method (like 'views') or tuple with name and key arguments (like ('city', 'Москва'));
+            - starts, ends - array-like objects with start and end dates of windows;
+            - agg:str - if None, returns 2D np.ndarray with one row for every window padded with np.nan,
+              otherwise returns np.ndarray with 'sum', 'mean', 'min' or 'max' of every window without missing values
+              (0 for 'sum' and np.nan for other aggs of windows without values);
+        '''
+
+        # preprocessing agg argument
+        if agg not in (None, 'sum', 'mean', 'min', 'max'):
+            raise ValueError(f"Unknown agg: {agg}. Available aggs are None, 'sum', 'mean', 'min', 'max'.")
+
+        # preprocessing metric argument
+        key = self._preprocess_metric_item(metric)
+
+        # preprocessing starts and ends arguments
+        try:
+            starts = pd.to_datetime(np.asarray(starts).ravel()).values.astype('datetime64[ns]')
+            ends = pd.to_datetime(np.asarray(ends).ravel()).values.astype('datetime64[ns]')
+        except Exception as ex:
+            raise ValueError(f'Cannot convert starts or ends argument to dates ({ex}).')
+
+        if len(starts) != len(ends):
+            raise ValueError(f'Arguments starts and ends have different lengths ({len(starts)} vs. {len(ends)}).')
+
+        if np.any(starts < self.__start) or np.any(ends > self.__end):
+            raise ValueError(f'Windows are out of valid dates ({str(self.__start)[:10]} - {str(self.__end)[:10]}).')
+
+        # if any start is greater than end
+        if np.any(starts >= ends):
+            raise ValueError('Start is greater than end or is equal to end.')
+
+        dates, values = self._series_index.get(*key)
+
+        # bounds of all windows with vectorized binary search
+        lefts = np.searchsorted(dates, starts, side='left')
+        rights = np.searchsorted(dates, ends, side='right')
+        lengths = rights - lefts
+
+        if agg is None:
+            width = lengths.max(initial=0)
+            positions = lefts[:, None] + np.arange(width)
+            padded = np.append(values.astype(np.float64), np.nan)
+            return np.where(positions < rights[:, None], padded[np.minimum(positions, len(values))], np.nan)
+
+        if agg in ('sum', 'mean'):
+            cumsum = self._series_index.cumsum(*key)
+            counts = self._series_index.counts(*key)
+            sums = (cumsum[rights] - cumsum[lefts]).astype(np.float64)
+            present = counts[rights] - counts[lefts]
+            result = sums if agg == 'sum' else sums / np.maximum(present, 1)
+            result[present == 0] = np.nan if agg == 'mean' else 0
+            return result
+
+        # reduceat over interleaved bounds reduces values[left:right] at even positions,
+        # the extra value keeps right bounds inside the array (fmin and fmax skip np.nan)
+        ufunc = np.fmin if agg == 'min' else np.fmax
+        padded = np.append(values.astype(np.float64), np.nan)
+        result = np.full(len(starts), np.nan)
+        full = lengths > 0
+        if full.any():
+            interleaved = np.column_stack((lefts[full], rights[full])).ravel()
+            result[full] = ufunc.reduceat(padded, interleaved)[::2]
+
+        return result
+
+
+    def rolling(self, window:int, stat:str, metrics) -> tuple:
+        '''
+        Returns (dates, values) tuple, where dates is np.ndarray with all days from start date to end date 
+        and values is dict with np.ndarray of rolling statistic of the last window days for every metric.
+        Statistic is np.nan for the first window - 1 days and for windows with missing days.
+        All metrics are computed at once as one 2D array, results are cached and read-only.
+        Parameters:
+            - window:int - number of days in window;
+            - stat:str - 'sum', 'mean', 'std', 'min' or 'max';
+            - metrics - the same as in DataSet.resample();
+        '''
+
+        # preprocessing window argument
+        if not isinstance(window, int) or window <= 0:
+            raise ValueError(f'Argument window has to be positive integer (found {window}).')
+
+        # preprocessing stat argument
+        if stat not in ('sum', 'mean', 'std', 'min', 'max'):
+            raise ValueError(f"Unknown stat: {stat}. Available stats are 'sum', 'mean', 'std', 'min', 'max'.")
+
+        metrics = list(metrics)
+
+        # preprocessing metrics argument
+        keys = tuple(self._preprocess_metric_item(metric) for metric in metrics)
+
+        dates = np.arange(np.datetime64(self.__start, 'D'), np.datetime64(self.__end, 'D') + 1)
+
+        if ('rolling', window, stat, keys) not in self._derived_cache:
+
+            # metrics x days matrix, missing days are np.nan
+            matrix = self._aligned(keys, dates, np.nan, np.float64)
+
+            result = np.full(matrix.shape, np.nan)
+
+            if window <= len(dates):
+
+                if stat in ('sum', 'mean'):
+
+                    # sums of windows with prefix sums, windows with missing days are np.nan
+                    cumsum = np.zeros((len(keys), len(dates) + 1))
+                    np.cumsum(np.nan_to_num(matrix), axis=1, out=cumsum[:, 1:])
+                    counts = np.zeros((len(keys), len(dates) + 1))
+                    np.cumsum(~np.isnan(matrix), axis=1, out=counts[:, 1:])
+
+                    sums = cumsum[:, window:] - cumsum[:, :-window]
+                    full = counts[:, window:] - counts[:, :-window] == window
+                    result[:, window - 1:] = np.where(full, sums / window if stat == 'mean' else sums, np.nan)
+
+                else:
+
+                    # windows are views of matrix, np.nan is propagated by reductions
+                    windows = np.lib.stride_tricks.sliding_window_view(matrix, window, axis=1)
+                    if stat == 'std':
+                        result[:, window - 1:] = windows.std(axis=-1, ddof=1) if window > 1 else np.nan
+                    elif stat == 'min':
+                        result[:, window - 1:] = windows.min(axis=-1)
+                    else:
+                        result[:, window - 1:] = windows.max(axis=-1)
+
+            result.flags.writeable = False
+            self._derived_cache[('rolling', window, stat, keys)] = result
+
+        result = self._derived_cache[('rolling', window, stat, keys)]
+
+        return dates, {metric: result[row] for row, metric in enumerate(metrics)}
+
+
+    def matrix(self, metrics, start=None, end=None, fill=0) -> tuple:
+        '''
+        Returns (dates, matrix) tuple, where dates is np.ndarray with all days from start date to end date
+        and matrix is 2D np.ndarray with one row for every metric aligned to dates.
+        Matrix is int32 if all metrics are integer and fill is integer, otherwise it is float32.
+        Matrix of all days is built once and cached, result is C-contiguous: the cached read-only matrix 
+        for all days or a copy of its columns for shorter ranges.
+        Parameters:
+            - metrics - the same as in DataSet.resample();
+            - start, end - the same as in DataSet methods;
+            - fill - value for missing days;
+        '''
+
+        metrics = list(metrics)
+
+        # preprocessing metrics argument
+        keys = tuple(self._preprocess_metric_item(metric) for metric in metrics)
+
+        # preprocessing start argument
+        start = self._preprocess_start(start)
+
+        # preprocessing end argument
+        end = self._preprocess_end(end)
+
+        # if start is greater than end
+        if start >= end:
+            raise ValueError('Start is greater than end or is equal to end.')
+
+        dates = np.arange(np.datetime64(self.__start, 'D'), np.datetime64(self.__end, 'D') + 1)
+
+        # np.nan is not equal to itself, so fill is keyed by its representation
+        cache_key = ('matrix', keys, repr(fill))
+
+        if cache_key not in self._derived_cache:
+
+            # int32 keeps integer counts exactly and is as compact as float32
+            integer = isinstance(fill, (int, np.integer)) and all(self._series_index.get(*key)[1].dtype.kind in 'iub' for key in keys)
+            dtype = np.int32 if integer else np.float32
+            if integer and any(len(values) and np.abs(values).max() > np.iinfo(np.int32).max
+                               for _, values in (self._series_index.get(*key) for key in keys)):
+                dtype = np.int64
+
+            matrix = self._aligned(keys, dates, fill, dtype)
+            matrix.flags.writeable = False
+            self._derived_cache[cache_key] = matrix
+
+        matrix = self._derived_cache[cache_key]
+
+        # days of the range are a slice of all days, columns of shorter ranges are copied to keep rows contiguous
+        left = np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+        right = np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+        if (left, right) != (0, len(dates)):
+            matrix = np.ascontiguousarray(matrix[:, left:right])
+
+        return dates[left:right], matrix
+
+
+    def demographics(self, start=None, end=None, by:str='gender_age', normalize:bool=False) -> tuple:
+        '''
+        Returns (dates, distribution) tuple, where dates is np.ndarray with all days from start date to end date
+        and distribution is np.ndarray with audience of every day:
+            - by='gender_age' - days x genders (GENDERS) x ages (AGES) array built with gender_age rows;
+            - by='age' - days x ages array built with age rows;
+            - by='gender' - days x genders array built with gender rows;
+        Missing days are 0. Distribution is int64 if all values are integers, otherwise it is float64 
+        (missing values of export stay np.nan). Arrays of all days are built once and cached, so result is read-only view of them.
+        Parameters:
+            - start, end - the same as in DataSet methods;
+            - by:str - 'gender_age', 'age' or 'gender';
+            - normalize:bool - if True, returns shares of every day's audience (np.nan for days without audience and for missing values);
+        '''
+
+        # preprocessing by argument
+        keys = {'gender_age': [('gender_age', gender, age) for gender in GENDERS for age in AGES],
+                'age': [('age', age, None) for age in AGES],
+                'gender': [('gender', gender, None) for gender in GENDERS]}
+        if by not in keys:
+            raise ValueError(f"Unknown by: {by}. Available values are 'gender_age', 'age', 'gender'.")
+
+        # preprocessing start argument
+        start = self._preprocess_start(start)
+
+        # preprocessing end argument
+        end = self._preprocess_end(end)
+
+        # if start is greater than end
+        if start >= end:
+            raise ValueError('Start is greater than end or is equal to end.')
+
+        dates = np.arange(np.datetime64(self.__start, 'D'), np.datetime64(self.__end, 'D') + 1)
+
+        if ('demographics', by, normalize) not in self._derived_cache:
+
+            # int64 keeps integer counts exactly, float values (and missing values) need float64
+            integer = all(self._series_index.get(*key)[1].dtype.kind in 'iub' for key in keys[by] if key in self._series_index)
+            dtype = np.int64 if integer else np.float64
+
+            # days are the first axis, so every range is a contiguous slice
+            distribution = np.ascontiguousarray(self._aligned(tuple(keys[by]), dates, 0, dtype).T)
+            if by == 'gender_age':
+                distribution = distribution.reshape(len(dates), len(GENDERS), len(AGES))
+
+            if normalize:
+
+                # missing values are not counted in totals, their shares stay np.nan
+                totals = np.nansum(distribution, axis=tuple(range(1, distribution.ndim)), keepdims=True)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    distribution = np.where(totals > 0, distribution / totals, np.nan)
+
+            distribution.flags.writeable = False
+            self._derived_cache[('demographics', by, normalize)] = distribution
+
+        distribution = self._derived_cache[('demographics', by, normalize)]
+
+        # days of the range are a slice of all days
+        left = np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+        right = np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+
+        return dates[left:right], distribution[left:right]
+
+
+    def top_cities(self, k:int=10, start=None, end=None, agg:str='sum') -> tuple:
+        '''
+        Returns (cities, values) tuple with k cities with the greatest values from start date to end date 
+        (sorted from the greatest value).
+        Parameters:
+            - k:int - number of cities;
+            - start, end - the same as in DataSet methods;
+            - agg:str - 'sum' (sum of values) or 'mean' (mean of days with values), missing values (np.nan) are skipped;
+        '''
+        return self._top('cities', self._cities, k, start, end, agg)
+
+
+    def top_countries(self, k:int=10, start=None, end=None, agg:str='sum') -> tuple:
+        '''
+        Returns (countries, values) tuple with k countries with the greatest values from start date to end date 
+        (sorted from the greatest value). Parameters are the same as in DataSet.top_cities().
+        '''
+        return self._top('countries', self._countries, k, start, end, agg)
 
 
     @classmethod
-    def from_excel(cls, path:str, **kwargs):
+    def from_excel(cls, path:str, cache:bool=False, criteria=None, start=None, end=None, include_geo:bool=True, **kwargs):
         '''
         Creating DataSet object with .xls file.
         Parameters:
             - path:str - .xls file's path;
+            - cache:bool - if True, parsed data is stored to .npz file near .xls file
+              and is loaded from it while .xls file is not changed;
+            - criteria - if not None, only rows of these criterions (like ['reach', 'members']) are kept 
+              (views rows are always kept, because they define start date);
+            - start, end - if not None, only rows from start date to end date are kept;
+            - include_geo:bool - if False, rows of cities and countries are dropped;
             - **kwargs - parameters for pd.read_excel();
         '''
 
@@ -493,22 +952,48 @@ class DataSet(pd.DataFrame):
         if file_extension != '.xls':
             raise ValueError('Input file is not .xls file.')
 
+        # preprocessing filters
+        filters = cls._preprocess_filters(criteria, start, end, include_geo)
+        options = dict(kwargs, filters=filters) if filters is not None else kwargs
+
+        # loading DataSet object from cache
+        if cache:
+            series_index = sidecar.load(path, options)
+            if series_index is not None:
+                return cls(series_index=series_index)
+
         # creating DataFrame with read_excel()
         try:
             dataframe = pd.read_excel(path, **kwargs)
         except Exception as ex:
             raise FileExistsError(f'Error reading file ({ex}).')
 
+        # .xls sheet is parsed at once, so rows are filtered before DataSet is built
+        if filters is not None:
+            dataframe = cls._filter_rows(dataframe, filters)
+
         # creating DataSet object
-        return cls(dataframe) 
+        dataset = cls(dataframe)
+
+        if cache:
+            dataset._save_cache(path, options)
+
+        return dataset
 
 
     @classmethod
-    def from_csv(cls, path:str, **kwargs):
+    def from_csv(cls, path:str, chunksize:int=None, cache:bool=False, criteria=None, start=None, end=None, 
+                 include_geo:bool=True, **kwargs):
         '''
         Creating DataSet object with .csv file.
         Parameters:
             - path:str - .csv file's path;
+            - chunksize:int - if not None, file is read by chunks of chunksize rows, 
+              and only compact series of every chunk are kept in memory;
+            - cache:bool - if True, parsed data is stored to .npz file near .csv file
+              and is loaded from it while .csv file is not changed;
+            - criteria, start, end, include_geo - the same as in DataSet.from_excel(), 
+              rows are filtered while file is read by chunks;
             - **kwargs - parameters for pd.read_csv();
         '''
 
@@ -517,32 +1002,208 @@ class DataSet(pd.DataFrame):
 
         # if input file is not .csv file
         if file_extension != '.csv':
-            raise ValueError('Input file is not .xls file.')
+            raise ValueError('Input file is not .csv file.')
+
+        # preprocessing chunksize argument
+        if chunksize is not None and (not isinstance(chunksize, int) or chunksize <= 0):
+            raise ValueError(f'Argument chunksize has to be positive integer (found {chunksize}).')
 
-        # creating DataFrame with read_csv()
+        # preprocessing filters
+        filters = cls._preprocess_filters(criteria, start, end, include_geo)
+        options = dict(kwargs, filters=filters) if filters is not None else kwargs
+
+        # loading DataSet object from cache
+        if cache:
+            series_index = sidecar.load(path, options)
+            if series_index is not None:
+                return cls(series_index=series_index)
+
+        if chunksize is not None or filters is not None:
+
+            # reading file with read_csv() chunks
+            try:
+                reader = pd.read_csv(path, chunksize=chunksize or READ_CHUNKSIZE, **kwargs)
+            except Exception as ex:
+                raise FileExistsError(f'Error reading file ({ex}).')
+
+            # filtering rows of every chunk, so unused rows are never kept
+            with reader:
+                chunks = (chunk if filters is None else cls._filter_rows(chunk, filters) for chunk in reader)
+
+                if chunksize is not None:
+
+                    # building series with chunks
+                    builder = SeriesIndexBuilder()
+                    for chunk in chunks:
+                        builder.add(chunk)
+
+                    # creating DataSet object
+                    dataset = cls(series_index=builder.build())
+
+                else:
+
+                    # creating DataSet object with kept rows
+                    dataset = cls(pd.concat(list(chunks), ignore_index=True))
+
+        else:
+
+            # creating DataFrame with read_csv()
+            try:
+                dataframe = pd.read_csv(path, **kwargs)
+            except Exception as ex:
+                raise FileExistsError(f'Error reading file ({ex}).')
+
+            # creating DataSet object
+            dataset = cls(dataframe)
+
+        if cache:
+            dataset._save_cache(path, options)
+
+        return dataset
+
+
+    def append_export(self, export, **kwargs) -> None:
+        '''
+        Appends newer VK export to DataSet in place. 
+        Values of export replace values of DataSet for the same series and dates.
+        Only rows of export are parsed and grouped, and series and rows of DataSet are stored in arrays 
+        with spare capacity (doubled when new rows don't fit), so time of append is proportional to size of export 
+        (DataSet is copied only when arrays are full, when export changes values of existing dates 
+        and when export has dates before the start date).
+        Parameters:
+            - export - pd.DataFrame or path of .xls or .csv file;
+            - **kwargs - parameters for pd.read_excel() or pd.read_csv();
+        '''
+
+        # columns of attached DataSet are views of shared memory block
+        if getattr(self, '_shared_memory', None) is not None:
+            raise ValueError('Cannot append export to DataSet attached to shared memory.')
+
+        if isinstance(export, str):
+
+            # splitting path for file's extension
+            filename, file_extension = os.path.splitext(export)
+
+            # if input file is not .xls or .csv file
+            readers = {'.xls': pd.read_excel, '.csv': pd.read_csv}
+            if file_extension not in readers:
+                raise ValueError('Input file is not .xls or .csv file.')
+
+            # creating DataFrame with read_excel() or read_csv()
+            try:
+                export = readers[file_extension](export, **kwargs)
+            except Exception as ex:
+                raise FileExistsError(f'Error reading file ({ex}).')
+
+        elif not isinstance(export, pd.DataFrame):
+            raise TypeError(f'Export argument has to be pd.DataFrame or str (found {type(export)} type).')
+
+        # grouping only new rows
+        builder = SeriesIndexBuilder()
+        builder.add(export)
+        new_index = builder.build()
+
+        if not new_index.keys():
+            return
+
+        first = min(dates[0] for dates, _ in (new_index.get(*key) for key in new_index.keys()))
+        last = max(dates[-1] for dates, _ in (new_index.get(*key) for key in new_index.keys()))
+
+        self._series_index.append(new_index)
+
+        # the first views date can move back, so rows before it are dropped and all rows are rebuilt 
+        # as by DataSet.__init__() (start date is NaT for DataSet without rows)
+        if not first >= self.__start:
+            views_dates, _ = self._series_index.get('views')
+            if len(views_dates):
+                self._series_index = self._series_index.trim(views_dates[0])
+
+            self._row_buffer = None
+            self._update_inplace(self._series_index.to_frame())
+
+            # start date
+            self.__start = np.datetime64(self['Дата'].min())
+
+            # end date
+            self.__end = np.datetime64(self['Дата'].max())
+
+        else:
+
+            # rows are kept in arrays with spare capacity, which are not shared with copies of DataSet
+            row_buffer = getattr(self, '_row_buffer', None)
+            if row_buffer is None or not row_buffer.holds(self):
+                row_buffer = self._row_buffer = RowBuffer(self)
+
+            # rows of DataFrame are ordered by date, so only rows from the first new date are replaced
+            left = np.searchsorted(self['Дата'].values, first, side='left')
+            row_buffer.replace(left, self._series_index.trim(first).to_frame())
+
+            self._update_inplace(row_buffer.to_frame())
+
+            # end date
+            self.__end = max(self.__end, last)
+
+        # rolling statistics, matrices and cached results are stale
+        self._derived_cache.clear()
+        if self._query_cache is not None:
+            self._query_cache.clear()
+
+        # available cities in DataSet
+        self._cities = self._series_index.params('cities')
+
+        # available countries in DataSet
+        self._countries = self._series_index.params('countries')
+
+
+    def to_shared_memory(self):
+        '''
+        Returns multiprocessing.shared_memory.SharedMemory block with dates, values and key codes of DataSet.
+        Pass name of the block to DataSet.attach() in other processes. 
+        Call close() and unlink() of the block when all processes are finished.
+        '''
+        return shared.create(self._series_index)
+
+
+    @classmethod
+    def attach(cls, name:str):
+        '''
+        Creating DataSet object with shared memory block created by DataSet.to_shared_memory().
+        Columns and series of DataSet are read-only views of the block, so no data is copied.
+        Parameters:
+            - name:str - name of shared memory block;
+        '''
+
+        # attaching to shared memory block
         try:
-            dataframe = pd.read_csv(path, **kwargs)
+            block, frame, series_index = shared.attach(name)
         except Exception as ex:
-            raise FileExistsError(f'Error reading file ({ex}).')
+            raise FileNotFoundError(f'Error attaching shared memory block ({ex}).')
 
-        # creating DataSet object
-        return cls(dataframe) 
+        dataset = cls(frame, series_index=series_index)
+
+        # block has to be opened while DataSet is used
+        dataset._shared_memory = block
+
+        return dataset
+
+
+    def _save_cache(self, path:str, options:dict) -> None:
+        '''Writes series of DataSet to sidecar cache of source file.'''
+
+        # cache is optional, so DataSet is returned even if cache cannot be written
+        try:
+            sidecar.save(path, options, self._series_index)
+        except OSError:
+            pass
 
 
     def _preprocess_start(self, start=None):
         '''Preprocesses start date.'''
 
-        if start:
-
-            # if start is not str
-            if not isinstance(start, str):
-                raise TypeError(f'Start argument has to be str (found {type(start)} type).')
+        if start is not None and not (isinstance(start, str) and not start):
 
             # converting start to datetime
-            try:
-                start = np.datetime64(start)
-            except Exception as ex:
-                raise ValueError('Cannot convert start argument to date.')
+            start = self._to_datetime64(start, 'Start')
 
             # if start is lower than self.__start
             if start < self.__start:
@@ -557,17 +1218,10 @@ class DataSet(pd.DataFrame):
     def _preprocess_end(self, end=None):
         '''Preprocesses end date.'''
 
-        if end:
-
-            # if end is not str
-            if not isinstance(end, str):
-                raise TypeError(f'Start argument has to be str (found {type(end)} type).')
+        if end is not None and not (isinstance(end, str) and not end):
 
             # converting end to datetime
-            try:
-                end = np.datetime64(end)
-            except Exception as ex:
-                raise ValueError('Cannot convert end argument to date.')
+            end = self._to_datetime64(end, 'End')
 
             # if end is greater than self.__end
             if end > self.__end:
@@ -576,4 +1230,268 @@ class DataSet(pd.DataFrame):
         else:
             end = self.__end
 
-        return end
\ No newline at end of file
+        return end
+
+
+    def _preprocess_metric(self, metric:str, keys:dict) -> tuple:
+        '''Preprocesses name of DataSet method and its key arguments to series key.'''
+
+        if metric in METRICS:
+
+            # if method has no key arguments
+            if keys:
+                raise TypeError(f'Metric {metric} has no key arguments (found {list(keys)}).')
+
+            return METRICS[metric]
+
+        if metric not in KEYED_METRICS:
+            raise ValueError(f'Unknown metric: {metric}. Available metrics are {list(METRICS) + list(KEYED_METRICS)}.')
+
+        criterion, defaults = KEYED_METRICS[metric]
+
+        # if unknown key arguments were passed
+        unknown = set(keys) - set(defaults)
+        if unknown:
+            raise TypeError(f'Unknown key arguments of metric {metric}: {sorted(unknown)}. Available are {list(defaults)}.')
+
+        params = tuple(keys.get(name, default) for name, default in defaults.items())
+        key = (criterion,) + params
+
+        # if there is no series for key arguments
+        if key + (None,) * (3 - len(key)) not in self._series_index:
+            raise ValueError(f'Unknown key arguments of metric {metric}: {dict(zip(defaults, params))}.')
+
+        return key
+
+
+    def _aligned(self, keys:tuple, dates:np.ndarray, fill, dtype) -> np.ndarray:
+        '''Returns 2D np.ndarray with values of every series key aligned to days, missing days are fill.'''
+
+        matrix = np.full((len(keys), len(dates)), fill, dtype=dtype)
+        for row, key in enumerate(keys):
+            series_dates, values = self._series_index.get(*key)
+            matrix[row, np.searchsorted(dates, series_dates.astype('datetime64[D]'))] = values
+
+        return matrix
+
+
+    def _preprocess_metric_item(self, metric) -> tuple:
+        '''Preprocesses name of DataSet method or tuple with name and key arguments to (criterion, param1, param2) key.'''
+
+        if isinstance(metric, str):
+            key = self._preprocess_metric(metric, {})
+
+        else:
+            name, *args = metric
+            names = list(KEYED_METRICS[name][1]) if name in KEYED_METRICS else []
+
+            # if there are more key arguments than method has
+            if len(args) > len(names):
+                raise TypeError(f'Metric {name} has {len(names)} key arguments (found {len(args)}).')
+
+            key = self._preprocess_metric(name, dict(zip(names, args)))
+
+        return key + (None,) * (3 - len(key))
+
+
+    def _range_sum(self, metric:str, start, end, keys:dict) -> tuple:
+        '''Returns (sum, count) tuple of metric's values from start date to end date without missing values.'''
+
+        # preprocessing metric argument
+        key = self._preprocess_metric(metric, keys)
+
+        # preprocessing start argument
+        start = self._preprocess_start(start)
+
+        # preprocessing end argument
+        end = self._preprocess_end(end)
+
+        # if start is greater than end
+        if start >= end:
+            raise ValueError('Start is greater than end or is equal to end.')
+
+        dates, _ = self._series_index.get(*key)
+        cumsum = self._series_index.cumsum(*key)
+        counts = self._series_index.counts(*key)
+
+        # dates are sorted, so the range is a slice found by binary search
+        left = np.searchsorted(dates, start, side='left')
+        right = np.searchsorted(dates, end, side='right')
+
+        return cumsum[right] - cumsum[left], counts[right] - counts[left]
+
+
+    def _top(self, criterion:str, names:list, k:int, start, end, agg:str) -> tuple:
+        '''Returns (names, values) tuple with k series of criterion with the greatest values from start date to end date.'''
+
+        # preprocessing k argument
+        if not isinstance(k, int) or k <= 0:
+            raise ValueError(f'Argument k has to be positive integer (found {k}).')
+
+        # preprocessing agg argument
+        if agg not in ('sum', 'mean'):
+            raise ValueError(f"Unknown agg: {agg}. Available aggs are 'sum', 'mean'.")
+
+        # preprocessing start argument
+        start = self._preprocess_start(start)
+
+        # preprocessing end argument
+        end = self._preprocess_end(end)
+
+        # if start is greater than end
+        if start >= end:
+            raise ValueError('Start is greater than end or is equal to end.')
+
+        if ('top', criterion) not in self._derived_cache:
+
+            # all series of criterion are concatenated with keys (number of series, day), 
+            # so keys are sorted and bounds of all series are found with one binary search
+            series = [self._series_index.get(criterion, name) for name in names]
+            days = np.concatenate([dates.astype('datetime64[D]').astype(np.int64) for dates, _ in series] or [np.empty(0, dtype=np.int64)])
+            values = np.concatenate([values for _, values in series] or [np.empty(0, dtype=np.int64)])
+            numbers = np.repeat(np.arange(len(series), dtype=np.int64), [len(dates) for dates, _ in series])
+
+            # integer values are summed exactly, missing values are summed as 0 and not counted
+            dtype = np.int64 if values.dtype.kind in 'iub' else np.float64
+            cumsum = np.concatenate((np.zeros(1, dtype=dtype), np.cumsum(np.nan_to_num(values), dtype=dtype)))
+            counts = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(~np.isnan(values), dtype=np.int64)))
+
+            self._derived_cache[('top', criterion)] = ((numbers << 32) + days, cumsum, counts)
+
+        keys, cumsum, counts = self._derived_cache[('top', criterion)]
+
+        # bounds of every series' range
+        numbers = np.arange(len(names), dtype=np.int64) << 32
+        lefts = np.searchsorted(keys, numbers + np.datetime64(start, 'D').astype(np.int64), side='left')
+        rights = np.searchsorted(keys, numbers + np.datetime64(end, 'D').astype(np.int64), side='right')
+
+        totals = cumsum[rights] - cumsum[lefts]
+        if agg == 'mean':
+            present = counts[rights] - counts[lefts]
+            totals = np.where(present > 0, totals / np.maximum(present, 1), np.nan)
+
+        # selecting k greatest values without sorting all of them (missing means are the lowest)
+        totals = np.nan_to_num(totals, nan=-np.inf) if agg == 'mean' else totals
+        if k < len(totals):
+            selected = np.argpartition(-totals, k - 1)[:k]
+        else:
+            selected = np.arange(len(totals))
+        selected = selected[np.argsort(-totals[selected], kind='stable')]
+
+        values = totals[selected]
+        if agg == 'mean':
+            values = np.where(np.isinf(values), np.nan, values)
+
+        return [names[number] for number in selected], values
+
+
+    @classmethod
+    def _preprocess_filters(cls, criteria, start, end, include_geo:bool) -> dict:
+        '''Preprocesses filters of reading methods to dict (None if all rows are kept).'''
+
+        # preprocessing criteria argument
+        if criteria is not None:
+            if isinstance(criteria, str) or not all(isinstance(criterion, str) for criterion in criteria):
+                raise TypeError(f'Argument criteria has to be list of str (found {criteria}).')
+
+            # views rows define start date of DataSet
+            criteria = tuple(sorted(set(criteria) | {'views'}))
+
+        # preprocessing start and end arguments
+        if start is not None:
+            start = cls._to_datetime64(start, 'Start')
+        if end is not None:
+            end = cls._to_datetime64(end, 'End')
+
+        # if start is greater than end
+        if start is not None and end is not None and start >= end:
+            raise ValueError('Start is greater than end or is equal to end.')
+
+        # preprocessing include_geo argument
+        if not isinstance(include_geo, bool):
+            raise TypeError(f'Argument include_geo has to be bool (found {type(include_geo)} type).')
+
+        if criteria is None and start is None and end is None and include_geo:
+            return None
+
+        return {'criteria': criteria, 'start': start, 'end': end, 'include_geo': include_geo}
+
+
+    @staticmethod
+    def _filter_rows(df:pd.DataFrame, filters:dict) -> pd.DataFrame:
+        '''Returns rows of DataFrame in VK export format kept by filters.'''
+
+        mask = np.ones(len(df), dtype=bool)
+
+        if filters['criteria'] is not None:
+            mask &= df['Критерий'].isin(filters['criteria']).values
+
+        if not filters['include_geo']:
+            mask &= ~df['Критерий'].isin(GEO_CRITERIA).values
+
+        if filters['start'] is None and filters['end'] is None:
+            return df[mask]
+
+        # converting Дата column to datetime
+        try:
+            dates = pd.to_datetime(df['Дата']).values
+        except Exception as ex:
+            raise ValueError(f'Error converting Дата column ({ex}).')
+
+        if filters['start'] is not None:
+            mask &= dates >= filters['start']
+
+        if filters['end'] is not None:
+            mask &= dates <= filters['end']
+
+        # parsed dates are kept, so they are not parsed again
+        return df[mask].assign(Дата=dates[mask])
+
+
+    @staticmethod
+    def _preprocess_spec(spec) -> tuple:
+        '''Preprocesses criterion or (criterion, param1, param2) spec to series key.'''
+
+        key = (spec,) if isinstance(spec, str) else tuple(spec)
+        if not 1 <= len(key) <= 3:
+            raise ValueError(f'Unknown spec: {spec}. Spec has to be criterion or (criterion, param1, param2) tuple.')
+
+        return key
+
+
+    @staticmethod
+    def _to_datetime64(date, name:str) -> np.datetime64:
+        '''Converts str, np.datetime64, datetime.date or pd.Timestamp to np.datetime64.'''
+
+        # pd.Timestamp is a subclass of datetime.date
+        if isinstance(date, pd.Timestamp):
+            return date.to_datetime64()
+
+        if isinstance(date, (np.datetime64, datetime.date)):
+            date = np.datetime64(date)
+
+        elif isinstance(date, str):
+            try:
+                date = np.datetime64(date)
+            except Exception as ex:
+                raise ValueError(f'Cannot convert {name.lower()} argument to date.')
+
+        else:
+            raise TypeError(f'{name} argument has to be str, np.datetime64, datetime.date or pd.Timestamp (found {type(date)} type).')
+
+        if np.isnat(date):
+            raise ValueError(f'Cannot convert {name.lower()} argument to date.')
+
+        return date
+
+
+    def _select(self, start, end, criterion:str, param1=None, param2=None) -> np.ndarray:
+        '''Returns np.ndarray with values of (criterion, param1, param2) series from start date to end date.'''
+
+        dates, values = self._series_index.get(criterion, param1, param2)
+
+        # dates are sorted, so the range is a slice found by binary search
+        left = np.searchsorted(dates, start, side='left')
+        right = np.searchsorted(dates, end, side='right')
+
+        return values[left:right]
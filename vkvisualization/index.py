@@ -0,0 +1,514 @@
+import pandas as pd
+import numpy as np
+
+
+class SeriesIndex:
+    '''
+    Maps (criterion, param1, param2) keys of VK export to date-sorted series.
+    Every series is stored as a pair of contiguous np.ndarray - dates and values.
+    '''
+
+    def __init__(self, series=None) -> None:
+
+        # dict with (criterion, param1, param2) keys and (dates, values) values
+        self._series = {} if series is None else series
+
+        # dict with (criterion, param1, param2) keys and (dates, values) arrays with spare capacity, 
+        # series of appended keys are views of them
+        self._buffers = {}
+
+        # dict with (criterion, param1, param2) keys and prefix sums of values, built on first use
+        self._cumsums = {}
+
+        # dict with (criterion, param1, param2) keys and prefix counts of not missing values, built on first use
+        self._counts = {}
+
+        # dict with (criterion, param1, param2) keys and dicts of calendar rollups, built on first use
+        self._rollups = {}
+
+
+    def __contains__(self, key:tuple) -> bool:
+        return key in self._series
+
+
+    def __getstate__(self) -> dict:
+
+        # prefix sums, counts and rollups are rebuilt on demand and only views of buffers are pickled
+        state = self.__dict__.copy()
+        state['_buffers'] = {}
+        state['_cumsums'] = {}
+        state['_counts'] = {}
+        state['_rollups'] = {}
+
+        return state
+
+
+    def __setstate__(self, state:dict) -> None:
+
+        self.__dict__.update(state)
+
+        # unpickled arrays are writeable
+        for dates, values in self._series.values():
+            dates.flags.writeable = False
+            values.flags.writeable = False
+
+
+    @classmethod
+    def from_frame(cls, df:pd.DataFrame):
+        '''
+        Creating SeriesIndex object with DataFrame in VK export format.
+        Parameters:
+            - df:pd.DataFrame - DataFrame with Дата, Критерий, Парам. №1, Парам. №2 and Значение columns;
+        '''
+
+        series = {}
+        for key, dates, values in _group(df):
+
+            # series are returned as views, so they must not be changed by callers
+            dates.flags.writeable = False
+            values.flags.writeable = False
+
+            series[key] = (dates, values)
+
+        return cls(series)
+
+
+    def to_frame(self) -> pd.DataFrame:
+        '''
+        Returns date-sorted DataFrame in VK export format with categorical key columns and compact Значение column.
+        Rows of daily series are placed by counting days, so all series are not concatenated and argsorted first.
+        '''
+
+        keys = self.keys()
+        day_cursor = _day_cursor([self._series[key][0] for key in keys])
+
+        # series with time inside days are ordered by stable argsort of concatenated rows
+        if day_cursor is None:
+            columns = self.to_columns()
+            order = np.argsort(columns['Дата'], kind='stable')
+            columns = {column: values[order] for column, values in columns.items()}
+            columns['Значение'] = downcast(columns['Значение'])
+            return pd.DataFrame(columns, copy=False)
+
+        # integer values are stored compactly as in rows of DataSet
+        length = sum(len(self._series[key][0]) for key in keys)
+        dtype = compact_dtype([self._series[key][1] for key in keys])
+
+        # every series is written to its rows, numbers of series give codes of key columns
+        dates = np.empty(length, dtype='datetime64[ns]')
+        values = np.empty(length, dtype=dtype)
+        numbers = np.empty(length, dtype=np.int32)
+        for number, key in enumerate(keys):
+            rows = _next_rows(*day_cursor, self._series[key][0])
+            dates[rows], values[rows] = self._series[key]
+            numbers[rows] = number
+
+        columns = {'Дата': dates}
+        for position, column in enumerate(('Критерий', 'Парам. №1', 'Парам. №2')):
+            categories = list(dict.fromkeys(key[position] for key in keys if key[position] is not None))
+            lookup = {category: code for code, category in enumerate(categories)}
+            key_codes = np.array([lookup.get(key[position], -1) for key in keys], dtype=np.int32)
+            columns[column] = pd.Categorical.from_codes(key_codes[numbers], categories=categories)
+        columns['Значение'] = values
+
+        return pd.DataFrame(columns, copy=False)
+
+
+    def to_columns(self) -> dict:
+        '''
+        Returns dict with columns of VK export - np.ndarray for Дата and Значение 
+        and pd.Categorical for Критерий, Парам. №1 and Парам. №2.
+        Rows are ordered by series as in keys().
+        '''
+
+        keys = self.keys()
+        lengths = [len(self._series[key][0]) for key in keys]
+
+        columns = {'Дата': np.concatenate([self._series[key][0] for key in keys] or [np.empty(0, dtype='datetime64[ns]')])}
+
+        # categories and codes of every key column
+        for position, column in enumerate(('Критерий', 'Парам. №1', 'Парам. №2')):
+            categories = list(dict.fromkeys(key[position] for key in keys if key[position] is not None))
+            lookup = {category: code for code, category in enumerate(categories)}
+            key_codes = np.array([lookup.get(key[position], -1) for key in keys], dtype=np.int32)
+            columns[column] = pd.Categorical.from_codes(np.repeat(key_codes, lengths), categories=categories)
+
+        columns['Значение'] = np.concatenate([self._series[key][1] for key in keys] or [np.empty(0)])
+
+        return columns
+
+
+    def trim(self, start:np.datetime64):
+        '''Returns SeriesIndex object without dates lower than start.'''
+
+        series = {}
+        for key, (dates, values) in self._series.items():
+            left = np.searchsorted(dates, start, side='left')
+
+            # series without dates greater than start are dropped
+            if left < len(dates):
+                series[key] = (dates[left:], values[left:])
+
+        return SeriesIndex(series)
+
+
+    def append(self, other) -> None:
+        '''
+        Appends series of other SeriesIndex object in place. 
+        If dates of other series overlap dates of this series, values of other series are kept.
+        Only overlapping tails of series are sorted and written, series are stored in arrays with spare capacity 
+        (doubled when new values don't fit), so time of append is proportional to new and overlapping values.
+        Values of series returned before append don't change: series are copied if overlapping values are changed.
+        '''
+
+        for key, (new_dates, new_values) in other._series.items():
+
+            # prefix sums, counts and rollups of changed series are stale
+            self._cumsums.pop(key, None)
+            self._counts.pop(key, None)
+            self._rollups.pop(key, None)
+
+            if key not in self._series:
+                self._series[key] = (new_dates, new_values)
+                continue
+
+            dates, values = self._series[key]
+
+            # dates that can overlap with new series
+            left = np.searchsorted(dates, new_dates[0], side='left')
+            tail_dates, tail_values = new_dates, new_values
+
+            if left < len(dates):
+                keep = ~np.isin(dates[left:], new_dates)
+                tail_dates = np.concatenate((dates[left:][keep], new_dates))
+                tail_values = np.concatenate((values[left:][keep], new_values))
+
+                # old dates inside new series' range break the order
+                if keep.any():
+                    order = np.argsort(tail_dates, kind='stable')
+                    tail_dates, tail_values = tail_dates[order], tail_values[order]
+
+            self._series[key] = self._write(key, left, tail_dates, tail_values)
+
+
+    def _write(self, key:tuple, left:int, tail_dates:np.ndarray, tail_values:np.ndarray) -> tuple:
+        '''Writes tail of series from left to buffers of series and returns (dates, values) views of series.'''
+
+        dates, values = self._series[key]
+        length = left + len(tail_dates)
+        dtype = np.result_type(values.dtype, tail_values.dtype)
+
+        # buffers are written in place only if tail fits and values visible in returned series don't change
+        buffers = self._buffers.get(key)
+        visible = len(dates) - left
+        if (buffers is None or length > len(buffers[0]) or buffers[1].dtype != dtype or visible and (
+                not np.array_equal(dates[left:], tail_dates[:visible])
+                or not np.array_equal(values[left:], tail_values[:visible], equal_nan=dtype.kind == 'f'))):
+            buffers = (np.empty(2 * length, dtype=dates.dtype), np.empty(2 * length, dtype=dtype))
+            buffers[0][:left], buffers[1][:left] = dates[:left], values[:left]
+            self._buffers[key] = buffers
+
+        buffers[0][left:length], buffers[1][left:length] = tail_dates, tail_values
+
+        # series are returned as views, so they must not be changed by callers
+        dates, values = buffers[0][:length], buffers[1][:length]
+        dates.flags.writeable = False
+        values.flags.writeable = False
+
+        return dates, values
+
+
+    def get(self, criterion:str, param1=None, param2=None) -> tuple:
+        '''Returns (dates, values) tuple of np.ndarray for key. Both arrays are empty if key is unknown.'''
+
+        try:
+            return self._series[(criterion, param1, param2)]
+        except KeyError:
+            return np.empty(0, dtype='datetime64[ns]'), np.empty(0)
+
+
+    def cumsum(self, criterion:str, param1=None, param2=None) -> np.ndarray:
+        '''
+        Returns np.ndarray with prefix sums of series' values for key (the first element is 0), 
+        so sum of values[left:right] is cumsum[right] - cumsum[left].
+        Missing values (np.nan) are summed as 0, so they don't spoil sums of other ranges.
+        '''
+
+        key = (criterion, param1, param2)
+
+        if key not in self._cumsums:
+            _, values = self.get(*key)
+
+            # integer values are summed exactly
+            dtype = np.int64 if values.dtype.kind in 'iub' else np.float64
+            cumsum = np.concatenate((np.zeros(1, dtype=dtype), np.cumsum(np.nan_to_num(values), dtype=dtype)))
+            cumsum.flags.writeable = False
+
+            self._cumsums[key] = cumsum
+
+        return self._cumsums[key]
+
+
+    def counts(self, criterion:str, param1=None, param2=None) -> np.ndarray:
+        '''
+        Returns np.ndarray with prefix counts of not missing values of series for key (the first element is 0), 
+        so number of values in values[left:right] except np.nan is counts[right] - counts[left].
+        '''
+
+        key = (criterion, param1, param2)
+
+        if key not in self._counts:
+            _, values = self.get(*key)
+
+            counts = np.zeros(len(values) + 1, dtype=np.int64)
+            if values.dtype.kind in 'iub':
+                counts[1:] = np.arange(1, len(values) + 1)
+            else:
+                np.cumsum(~np.isnan(values), out=counts[1:])
+            counts.flags.writeable = False
+
+            self._counts[key] = counts
+
+        return self._counts[key]
+
+
+    def rollup(self, key:tuple, freq:str, agg:str) -> tuple:
+        '''
+        Returns (periods, values) tuple of np.ndarray with series' values aggregated by calendar periods.
+        Parameters:
+            - key:tuple - (criterion, param1, param2) key;
+            - freq:str - 'W' (weeks from Monday), 'M' (months), 'Q' (quarters) or 'Y' (years);
+            - agg:str - 'sum', 'mean' or 'max';
+        Periods are labeled with their first days, periods without values are skipped.
+        '''
+
+        # preprocessing agg argument
+        if agg not in ('sum', 'mean', 'max'):
+            raise ValueError(f"Unknown agg: {agg}. Available aggs are 'sum', 'mean', 'max'.")
+
+        rollups = self._rollups.setdefault(key, {})
+
+        if (freq, agg) not in rollups:
+            dates, values = self.get(*key)
+            periods = period_starts(dates, freq)
+
+            # series are sorted by date, so every period is a contiguous slice
+            bounds = np.flatnonzero(np.concatenate(([True], periods[1:] != periods[:-1])))
+
+            if not len(values):
+                bounds = bounds[:0]
+                result = np.empty(0, dtype=values.dtype if agg == 'sum' else np.float64)
+            elif agg == 'sum':
+                result = np.add.reduceat(values, bounds)
+            elif agg == 'mean':
+                result = np.add.reduceat(values, bounds, dtype=np.float64) / np.diff(np.append(bounds, len(values)))
+            else:
+                result = np.maximum.reduceat(values, bounds).astype(np.float64)
+
+            result.flags.writeable = False
+            rollups[(freq, agg)] = (periods[bounds], result)
+
+        return rollups[(freq, agg)]
+
+
+    def keys(self) -> list:
+        '''Returns list with all (criterion, param1, param2) keys.'''
+        return list(self._series)
+
+
+    def params(self, criterion:str) -> list:
+        '''Returns list with all param1 values for criterion.'''
+        return list(dict.fromkeys(key[1] for key in self._series if key[0] == criterion))
+
+
+class SeriesIndexBuilder:
+    '''
+    Builds SeriesIndex object with DataFrame chunks in VK export format.
+    Only compact dates and values of every chunk are kept, so chunks can be freed after add().
+    '''
+
+    def __init__(self) -> None:
+
+        # dict with (criterion, param1, param2) keys and lists of (dates, values) parts
+        self._parts = {}
+
+
+    def add(self, df:pd.DataFrame) -> None:
+        '''Adds rows of DataFrame chunk to built series.'''
+
+        # converting Дата column to datetime
+        try:
+            df = df.assign(Дата=pd.to_datetime(df['Дата']))
+        except Exception as ex:
+            raise ValueError(f'Error converting Дата column ({ex}).')
+
+        for key, dates, values in _group(df):
+            self._parts.setdefault(key, []).append((dates, values))
+
+
+    def build(self) -> SeriesIndex:
+        '''Returns SeriesIndex object with all added rows.'''
+
+        # parts of every series are freed when it is built, so chunks are not kept twice
+        series = {}
+        for key in list(self._parts):
+            parts = self._parts.pop(key)
+
+            dates = np.concatenate([part[0] for part in parts])
+            values = np.concatenate([part[1] for part in parts])
+
+            # chunks are not guaranteed to be ordered by date
+            if np.any(dates[1:] < dates[:-1]):
+                order = np.argsort(dates, kind='stable')
+                dates, values = dates[order], values[order]
+
+            # series are returned as views, so they must not be changed by callers
+            dates.flags.writeable = False
+            values.flags.writeable = False
+
+            series[key] = (dates, values)
+
+        return SeriesIndex(series)
+
+
+def downcast(values:np.ndarray) -> np.ndarray:
+    '''
+    Returns integer values as int32 if all of them are in its range, otherwise values are returned unchanged.
+    Used for storage only: series (and results of DataSet methods) keep integer values as int64, 
+    because int32 arithmetic silently overflows (like views ** 2 or views * 100 of large groups).
+    '''
+
+    if not len(values):
+        return values
+
+    return values.astype(compact_dtype([values]), copy=False)
+
+
+def compact_dtype(arrays:list) -> np.dtype:
+    '''Returns dtype of concatenated arrays, int32 if all of them are integer values in its range (as in downcast()).'''
+
+    dtype = np.result_type(*(values.dtype for values in arrays)) if arrays else np.dtype(np.float64)
+    if dtype.kind not in 'iu':
+        return dtype
+
+    info = np.iinfo(np.int32)
+    if all(info.min <= values.min() and values.max() <= info.max for values in arrays if len(values)):
+        return np.dtype(np.int32)
+
+    return dtype
+
+
+def period_starts(dates:np.ndarray, freq:str) -> np.ndarray:
+    '''
+    Returns np.ndarray with first days of calendar periods of dates.
+    Parameters:
+        - dates:np.ndarray - dates;
+        - freq:str - 'W' (weeks from Monday), 'M' (months), 'Q' (quarters) or 'Y' (years);
+    '''
+
+    days = dates.astype('datetime64[D]')
+
+    if freq == 'W':
+        # 1970-01-01 is Thursday, so weeks from Monday are shifted by 3 days
+        weekdays = (days.astype(np.int64) + 3) % 7
+        return days - weekdays.astype('timedelta64[D]')
+
+    if freq == 'M':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+
+    if freq == 'Q':
+        months = days.astype('datetime64[M]').astype(np.int64)
+        return (months - months % 3).astype('datetime64[M]').astype('datetime64[D]')
+
+    if freq == 'Y':
+        return days.astype('datetime64[Y]').astype('datetime64[D]')
+
+    raise ValueError(f"Unknown freq: {freq}. Available freqs are 'W', 'M', 'Q', 'Y'.")
+
+
+def _day_cursor(series:list):
+    '''
+    Returns (first, cursor) tuple for counting sort of rows of series' dates by days, where first is the first day 
+    and cursor is np.ndarray with the first row of every day from the first day. Returns None if dates are not whole days.
+    '''
+
+    nonempty = [dates for dates in series if len(dates)]
+    if not nonempty:
+        return np.datetime64('1970-01-01'), np.zeros(1, dtype=np.int64)
+
+    first = min(dates[0] for dates in nonempty).astype('datetime64[D]')
+    last = max(dates[-1] for dates in nonempty).astype('datetime64[D]')
+
+    # numbers of rows of every day, shifted by one day for prefix sums
+    counts = np.zeros((last - first).astype(np.int64) + 2, dtype=np.int64)
+    for dates in nonempty:
+        days = dates.astype('datetime64[D]')
+        if np.any(days != dates):
+            return None
+        np.add.at(counts, (days - first).astype(np.int64) + 1, 1)
+
+    return first, np.cumsum(counts)
+
+
+def _next_rows(first:np.datetime64, cursor:np.ndarray, dates:np.ndarray) -> np.ndarray:
+    '''Returns np.ndarray with date-sorted rows of series' dates and moves cursor of their days.'''
+
+    days = (dates.astype('datetime64[D]') - first).astype(np.int64)
+
+    rows = cursor[days]
+
+    # rows of the same day are adjacent in series, so they are ranked from the first of them
+    if np.any(days[1:] == days[:-1]):
+        rows += np.arange(len(days)) - np.searchsorted(days, days, side='left')
+        np.add.at(cursor, days, 1)
+    else:
+        cursor[days] += 1
+
+    return rows
+
+
+def _group(df:pd.DataFrame) -> list:
+    '''Returns list with (key, dates, values) for every (criterion, param1, param2) key in DataFrame.'''
+
+    # integer codes of key columns (-1 for missing values),
+    # categorical columns are factorized by their codes
+    codes, uniques = [], []
+    for column in ('Критерий', 'Парам. №1', 'Парам. №2'):
+        column_codes, column_uniques = pd.factorize(df[column])
+        codes.append(column_codes.astype(np.int64))
+        uniques.append(column_uniques)
+
+    # one integer code for every (criterion, param1, param2) key
+    key = codes[0]
+    for column_codes, column_uniques in zip(codes[1:], uniques[1:]):
+        key = key * (len(column_uniques) + 1) + (column_codes + 1)
+
+    dates = df['Дата'].values.astype('datetime64[ns]')
+    values = df['Значение'].values
+
+    if not len(key):
+        return []
+
+    # sorting rows by key and date in one pass
+    order = np.lexsort((dates, key))
+    key = key[order]
+    dates = dates[order]
+    values = values[order]
+
+    # compact integer columns are widened, so series are int64
+    if values.dtype.kind in 'iub':
+        values = values.astype(np.int64, copy=False)
+
+    # boundaries of every series in sorted arrays
+    bounds = np.flatnonzero(key[1:] != key[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(key)]))
+
+    groups = []
+    for start, end in zip(starts, ends):
+        row = order[start]
+        series_key = tuple(None if column_codes[row] < 0 else column_uniques[column_codes[row]]
+                           for column_codes, column_uniques in zip(codes, uniques))
+        groups.append((series_key, dates[start:end], values[start:end]))
+
+    return groups
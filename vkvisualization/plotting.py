@@ -1,570 +1,817 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
 import matplotlib.pyplot as plt
 import pandas as pd
-
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+
+from vkvisualization.collection import DataSetCollection
 from vkvisualization.dataset import DataSet
 
 
-def visualize_views(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes views statistics with matplotlib'''
+# kinds of plots
+KINDS = ('plot', 'hist', 'bar', 'barh', 'fastbar')
 
-    data = dataset.views(start=start, 
-                         end=end)
 
-    x_axis = range(intercept, len(data) + intercept)
+class PlotSpec:
+    '''
+    Declarative description of plot of one DataSet metric. 
+    Data of spec is not fetched until it is drawn by PlotExecutor.
+    '''
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+    def __init__(self, metric:str, keys:dict=None, start=None, end=None, kind:str='plot', intercept:int=0, max_points:int=None) -> None:
+        '''
+        Parameters:
+            - metric:str - name of DataSet method (like 'views' or 'city');
+            - keys:dict - key arguments of DataSet method (like {'city': 'Москва'});
+            - start, end - the same as in DataSet methods;
+            - kind:str - 'plot', 'hist', 'bar', 'barh' or 'fastbar';
+            - intercept:int - the first x coordinate;
+            - max_points:int - the same as in plotting.downsample();
+        '''
 
+        # preprocessing kind argument
+        if kind not in KINDS:
+            raise ValueError(f"kind argument has to have values {_kinds_message(KINDS)}")
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes views statistics with matplotlib from start to end'''
+        if not isinstance(intercept, int):
+            raise TypeError('Argument intercept expected to be integer.')
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        elif kind == 'barh':
-            ax.barh(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist', 'bar' or 'barh'.")
+        self.metric = metric
+        self.keys = dict(keys or {})
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.intercept = intercept
+        self.max_points = max_points
 
 
-    return plot
+    def __repr__(self) -> str:
+        return (f'PlotSpec({self.metric!r}, {self.keys!r}, start={self.start!r}, end={self.end!r}, '
+                f'kind={self.kind!r}, intercept={self.intercept!r}, max_points={self.max_points!r})')
 
 
-def visualize_visitors(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes visitors statistics with matplotlib'''
+class PlotExecutor:
+    '''
+    Draws PlotSpec objects of one DataSet. 
+    Data of added specs is fetched when they are drawn, grouped by date ranges, 
+    and identical data requests are fetched once (also by later draws).
+    '''
 
-    data = dataset.visitors(start=start, 
-                            end=end)
+    def __init__(self, dataset:DataSet) -> None:
 
-    x_axis = range(intercept, len(data) + intercept)
+        self.dataset = dataset
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+        # added (spec, ax, kwargs) tuples waiting for render()
+        self._queue = []
 
+        # dict with data requests and (data, last drawn date) tuples
+        self._data = {}
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes visitors statistics with matplotlib from start to end'''
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    def add(self, spec:PlotSpec, ax, **kwargs) -> None:
+        '''
+        Adds spec to draw on ax with render(). Metric and dates of spec are checked at once, but data is not fetched.
+        Parameters:
+            - spec:PlotSpec - plot to draw;
+            - ax - matplotlib axes;
+            - **kwargs - parameters for ax.plot(), ax.hist(), ax.bar(), ax.barh() or plotting.bar_collection();
+        '''
 
+        self._request(spec)
+        self._queue.append((spec, ax, kwargs))
 
-    return plot
 
+    def render(self) -> list:
+        '''Fetches data of all added specs and draws them. Returns list with PlotHandle objects in order of specs.'''
 
-def visualize_age(dataset:DataSet, key='18-21', start=None, end=None, intercept=0):
-    '''Visualizes age statistics with matplotlib'''
+        queue, self._queue = self._queue, []
+        self.fetch([spec for spec, _, _ in queue])
 
-    data = dataset.age(start=start, 
-                       end=start,
-                       key=key)
+        return [self.draw(spec, ax, **kwargs) for spec, ax, kwargs in queue]
 
-    x_axis = range(intercept, len(data) + intercept)
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+    def draw(self, spec:PlotSpec, ax, **kwargs) -> 'PlotHandle':
+        '''Draws one spec on ax (data is fetched if it was not fetched yet) and returns PlotHandle object.'''
 
+        data, last = self.data(spec)
+        x_axis = range(spec.intercept, len(data) + spec.intercept)
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes age statistics with matplotlib from start to end'''
+        return PlotHandle(ax, spec.kind, x_axis, data, spec.metric, spec.keys, last, spec.max_points, kwargs)
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
 
+    def data(self, spec:PlotSpec) -> tuple:
+        '''
+        Returns (data, last) tuple, where data is np.ndarray with values of spec 
+        and last is the last date of DataSet when data was fetched (None if end of spec is fixed).
+        '''
 
-    return plot
+        request = self._request(spec)
+        if request not in self._data:
+            self.fetch([spec])
 
+        return self._data[request]
 
-def visualize_gender(dataset:DataSet, key='Ж', start=None, end=None, intercept=0):
-    '''Visualizes gender statistics with matplotlib'''
 
-    data = dataset.gender(start=start, 
-                          end=end,
-                          key=key)
+    def fetch(self, specs) -> None:
+        '''
+        Fetches data of specs that was not fetched yet, grouped by date ranges.
+        Series missing in export (like sections of export without them) are fetched as empty arrays and drawn empty.
+        '''
 
-    x_axis = range(intercept, len(data) + intercept)
+        # data requests of every date range
+        ranges = {}
+        for spec in specs:
+            key, start, end, fixed = request = self._request(spec)
+            if request not in self._data:
+                ranges.setdefault((start, end, fixed), set()).add(key)
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+        for (start, end, fixed), keys in ranges.items():
+            # the last drawn date, newer data is drawn by PlotHandle.update() only if end is not fixed
+            last = None if fixed else self.dataset.end_date()
 
+            # keys are validated by _request(), so unknown series are just empty
+            for key in sorted(keys, key=str):
+                self._data[(key, start, end, fixed)] = (self.dataset._select(start, end, *key), last)
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes gender statistics with matplotlib from start to end'''
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    def _request(self, spec:PlotSpec) -> tuple:
+        '''Returns (key, start, end, fixed) data request of spec, so specs of the same data have equal requests.'''
 
+        # unknown cities and countries are reported as by DataSet.city() and DataSet.country()
+        if spec.metric == 'city' and spec.keys.get('city') not in self.dataset._cities:
+            raise ValueError(f"Unknown city: {spec.keys.get('city')}. Use Dataset.available_cities() to check available cities.")
+        if spec.metric == 'country' and spec.keys.get('country') not in self.dataset._countries:
+            raise ValueError(f"Unknown country: {spec.keys.get('country')}. Use Dataset.available_countries() to check available countries.")
 
-    return plot
+        # preprocessing metric and keys
+        key = self.dataset._preprocess_metric(spec.metric, spec.keys)
 
+        # preprocessing start argument
+        start = self.dataset._preprocess_start(spec.start)
 
-def visualize_gender_age(dataset:DataSet, gender='Ж', age='18-21', start=None, end=None, intercept=0):
-    '''Visualizes gender and age statistics with matplotlib'''
+        # preprocessing end argument
+        end = self.dataset._preprocess_end(spec.end)
 
-    data = dataset.views(start=start, 
-                         end=end,
-                         gender=gender,
-                         age=age)
+        # if start is greater than end
+        if start >= end:
+            raise ValueError('Start is greater than end or is equal to end.')
 
-    x_axis = range(intercept, len(data) + intercept)
+        return key + (None,) * (3 - len(key)), start, end, spec.end is not None
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
 
+def _kinds_message(kinds:tuple) -> str:
+    '''Returns str with kinds for error message.'''
+    return ', '.join(f"'{kind}'" for kind in kinds[:-1]) + f" or '{kinds[-1]}'"
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes gender and age statistics with matplotlib from start to end'''
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+def _executor(dataset:DataSet) -> PlotExecutor:
+    '''
+    Returns PlotExecutor shared by all visualize_* functions of DataSet, so plots of the same data fetch it once.
+    Executor is kept with DataSet's derived data, so it is dropped when data of DataSet is changed.
+    '''
+    if ('plot_executor',) not in dataset._derived_cache:
+        dataset._derived_cache[('plot_executor',)] = PlotExecutor(dataset)
+
+    return dataset._derived_cache[('plot_executor',)]
+
+
+def _visualize(dataset:DataSet, spec:PlotSpec, kinds:tuple, doc:str):
+    '''Returns plot function of visualize_* function, data of spec is fetched by shared PlotExecutor when plot is drawn.'''
+
+    # metric and dates are checked at once
+    _executor(dataset)._request(spec)
+
+
+    def plot(ax, kind='plot', max_points=spec.max_points, **kwargs):
+
+        # preprocessing kind argument
+        if kind not in kinds:
+            raise ValueError(f"kind argument has to have values {_kinds_message(kinds)}")
+
+        # long series are downsampled before drawing (max_points of visualize function by default)
+        return _executor(dataset).draw(PlotSpec(spec.metric, spec.keys, spec.start, spec.end, kind, spec.intercept, max_points), ax, **kwargs)
+
 
+    plot.__doc__ = doc
 
     return plot
 
 
-def visualize_city(dataset:DataSet, city:str, start=None, end=None, intercept=0):
-    '''Visualizes city statistics with matplotlib'''
+def visualize_views(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes views statistics with matplotlib'''
 
-    data = dataset.views(city,
-                         start=start, 
-                         end=end)
+    spec = PlotSpec('views', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-    x_axis = range(intercept, len(data) + intercept)
+    return _visualize(dataset, spec, ('plot', 'bar', 'barh', 'fastbar'), 'Visualizes views statistics with matplotlib from start to end')
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
 
+def visualize_visitors(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes visitors statistics with matplotlib'''
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes city statistics with matplotlib from start to end'''
+    spec = PlotSpec('visitors', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes visitors statistics with matplotlib from start to end')
 
 
-    return plot
+def visualize_age(dataset:DataSet, key='18-21', start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes age statistics with matplotlib'''
 
+    spec = PlotSpec('age', {'key': key}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-def visualize_country(dataset:DataSet, country:str, start=None, end=None, intercept=0):
-    '''Visualizes country statistics with matplotlib'''
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes age statistics with matplotlib from start to end')
 
-    data = dataset.country(country,
-                           start=start, 
-                           end=end)
 
-    x_axis = range(intercept, len(data) + intercept)
+def visualize_gender(dataset:DataSet, key='Ж', start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes gender statistics with matplotlib'''
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+    spec = PlotSpec('gender', {'key': key}, start=start, end=end, intercept=intercept, max_points=max_points)
 
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes gender statistics with matplotlib from start to end')
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes country statistics with matplotlib from start to end'''
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+def visualize_gender_age(dataset:DataSet, gender='Ж', age='18-21', start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes gender and age statistics with matplotlib'''
 
+    spec = PlotSpec('gender_age', {'gender': gender, 'age': age}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-    return plot
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes gender and age statistics with matplotlib from start to end')
 
 
-def visualize_discussions(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes discussions statistics with matplotlib'''
+def visualize_city(dataset:DataSet, city:str, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes city statistics with matplotlib'''
 
-    data = dataset.discussions(start=start, 
-                               end=end)
+    spec = PlotSpec('city', {'city': city}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-    x_axis = range(intercept, len(data) + intercept)
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes city statistics with matplotlib from start to end')
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
 
+def visualize_country(dataset:DataSet, country:str, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes country statistics with matplotlib'''
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes discussions statistics with matplotlib from start to end'''
+    spec = PlotSpec('country', {'country': country}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes country statistics with matplotlib from start to end')
 
 
-    return plot
+def visualize_discussions(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes discussions statistics with matplotlib'''
 
+    spec = PlotSpec('discussions', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-def visualize_audio(dataset:DataSet, start=None, end=None, intercept=0):
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes discussions statistics with matplotlib from start to end')
+
+
+def visualize_audio(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
     '''Visualizes audio statistics with matplotlib'''
 
-    data = dataset.audio(start=start, 
-                         end=end)
+    spec = PlotSpec('audio', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-    x_axis = range(intercept, len(data) + intercept)
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes audio statistics with matplotlib from start to end')
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
 
+def visualize_videos(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes videos statistics with matplotlib'''
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes audio statistics with matplotlib from start to end'''
+    spec = PlotSpec('videos', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes videos statistics with matplotlib from start to end')
 
 
-    return plot
+def visualize_photo_albums(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes photo albums statistics with matplotlib'''
 
+    spec = PlotSpec('photo_albums', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-def visualize_videos(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes videos statistics with matplotlib'''
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes photo albums statistics with matplotlib from start to end')
 
-    data = dataset.videos(start=start, 
-                          end=end)
 
-    x_axis = range(intercept, len(data) + intercept)
+def visualize_likes(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes likes statistics with matplotlib'''
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+    spec = PlotSpec('likes', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes likes statistics with matplotlib from start to end')
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes videos statistics with matplotlib from start to end'''
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+def visualize_comments(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes comments statistics with matplotlib'''
 
+    spec = PlotSpec('comments', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-    return plot
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes comments statistics with matplotlib from start to end')
 
 
-def visualize_photo_albums(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes photo albums statistics with matplotlib'''
+def visualize_told_friends(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes told friends statistics with matplotlib'''
 
-    data = dataset.photo_albums(start=start, 
-                                end=end)
+    spec = PlotSpec('told_friends', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-    x_axis = range(intercept, len(data) + intercept)
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes told friends statistics with matplotlib from start to end')
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
 
+def visualize_new_members(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes new members statistics with matplotlib'''
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes photo albums statistics with matplotlib from start to end'''
+    spec = PlotSpec('new_members', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes new members statistics with matplotlib from start to end')
 
 
-    return plot
+def visualize_exited_members(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes exited members statistics with matplotlib'''
 
+    spec = PlotSpec('exited_members', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-def visualize_likes(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes likes statistics with matplotlib'''
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes exited members statistics with matplotlib from start to end')
 
-    data = dataset.likes(start=start, 
-                         end=end)
 
-    x_axis = range(intercept, len(data) + intercept)
+def visualize_reach(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes reach statistics with matplotlib'''
 
-    if not (isinstance(intercept, int) or intercept > 0):
-        raise TypeError('Argument intercept expected to be integer.')
+    spec = PlotSpec('reach', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes reach statistics with matplotlib from start to end')
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes likes statistics with matplotlib from start to end'''
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+def visualize_reach_subscribers(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes reach subscribers statistics with matplotlib'''
 
+    spec = PlotSpec('reach_subscribers', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-    return plot
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes reach subscribers statistics with matplotlib from start to end')
 
 
-def visualize_comments(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes comments statistics with matplotlib'''
+def visualize_reach_viral(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes reach viral statistics with matplotlib'''
 
-    data = dataset.comments(start=start, 
-                            end=end)
+    spec = PlotSpec('reach_viral', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-    x_axis = range(intercept, len(data) + intercept)
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes reach viral statistics with matplotlib from start to end')
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
 
+def visualize_reach_ads(dataset:DataSet, start=None, end=None, intercept=0, max_points:int=None):
+    '''Visualizes reach ads statistics with matplotlib'''
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes comments statistics with matplotlib from start to end'''
+    spec = PlotSpec('reach_ads', {}, start=start, end=end, intercept=intercept, max_points=max_points)
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    return _visualize(dataset, spec, ('plot', 'hist', 'bar', 'fastbar'), 'Visualizes reach ads statistics with matplotlib from start to end')
 
 
-    return plot
+class PlotHandle:
+    '''
+    Artists drawn by plot function of visualize_* functions.
+    PlotHandle.update() draws only values that were added to DataSet after the plot was drawn.
+    '''
 
+    def __init__(self, ax, kind:str, x_axis:range, data:np.ndarray, metric:str, keys:dict, last, max_points:int, kwargs:dict) -> None:
 
-def visualize_told_friends(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes told friends statistics with matplotlib'''
+        self.ax = ax
+        self.kind = kind
 
-    data = dataset.told_friends(start=start, 
-                                end=end)
+        # all drawn values and the next x coordinate
+        self._x = np.asarray(x_axis)
+        self._y = np.asarray(data)
+        self._next = x_axis.stop
 
-    x_axis = range(intercept, len(data) + intercept)
+        # DataSet method with key arguments and the last drawn date (None if newer data is not drawn)
+        self._metric = metric
+        self._keys = keys
+        self._last = last
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+        self._max_points = max_points
+        self._kwargs = kwargs
 
+        # list of artists of the plot and their color, so artists drawn later don't take the next color of axes
+        self.artists = self._draw(*downsample(self._x, self._y, max_points), kwargs)
+        self._color = self._artist_color()
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes told friends statistics with matplotlib from start to end'''
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    def update(self, dataset:DataSet) -> int:
+        '''
+        Draws values of DataSet that are newer than drawn values and returns number of new values.
+        Only new values are fetched and drawn: lines are extended with set_data(), bars are added, 
+        and only the axes are redrawn with blitting if new values are inside axes limits 
+        (otherwise axes limits are updated and the whole figure is redrawn).
+        Histograms and downsampled series depend on all values, so they are drawn again.
+        Parameters:
+            - dataset:DataSet - data of VK group with appended exports;
+        '''
 
+        if self._last is None:
+            return 0
 
-    return plot
+        # series of metric and its values newer than the last drawn date
+        key = dataset._preprocess_metric(self._metric, self._keys)
+        dates, values = dataset._series_index.get(*(key + (None,) * (3 - len(key))))
+        left = np.searchsorted(dates, self._last, side='right')
+        if left == len(dates):
+            return 0
 
+        new_x = np.arange(self._next, self._next + len(dates) - left)
+        new_y = values[left:]
 
-def visualize_new_members(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes new members statistics with matplotlib'''
+        self._x = np.append(self._x, new_x)
+        self._y = np.append(self._y, new_y)
+        self._next += len(new_y)
+        self._last = dates[-1]
 
-    data = dataset.new_members(start=start, 
-                               end=end)
+        # artists are drawn with the color of the first artists unless color is set by user
+        full_kwargs = dict(self._kwargs)
+        if self._color is not None and 'color' not in full_kwargs and 'facecolor' not in full_kwargs:
+            full_kwargs['color'] = self._color
 
-    x_axis = range(intercept, len(data) + intercept)
+        # new artists have no labels, so legend entries are not repeated
+        kwargs = {name: value for name, value in full_kwargs.items() if name != 'label'}
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+        if self.kind == 'hist' or (self._max_points is not None and len(self._y) > self._max_points):
+            for artist in self.artists:
+                artist.remove()
+            self.artists = self._draw(*downsample(self._x, self._y, self._max_points), full_kwargs)
+            self._color = self._color if self._color is not None else self._artist_color()
+            self._redraw()
+            return len(new_y)
 
+        if self.kind == 'plot':
+            line = self.artists[0]
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes new members statistics with matplotlib from start to end'''
+            # only the segment from the last drawn point is drawn with blitting
+            segment = (np.append(line.get_xdata()[-1:], new_x), np.append(line.get_ydata()[-1:], new_y))
+            line.set_data(self._x, self._y)
+            if not self._blit([(line, segment)], new_x, new_y):
+                self._redraw()
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
         else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+            bars = self._draw(new_x, new_y, kwargs)
+            self.artists += bars
+            self._color = self._color if self._color is not None else self._artist_color()
+            if not self._blit([(bar, None) for bar in bars], new_x, new_y):
+                self._redraw()
+
+        return len(new_y)
+
+
+    def _draw(self, x, y, kwargs:dict) -> list:
+        '''Draws values and returns list of artists.'''
+
+        if self.kind == 'plot':
+            return self.ax.plot(x, y, **kwargs)
+        elif self.kind == 'hist':
+            return list(self.ax.hist(self._y, **kwargs)[2])
+        elif self.kind == 'bar':
+            return list(self.ax.bar(x, y, **kwargs))
+        elif self.kind == 'fastbar':
+            return [bar_collection(self.ax, x, y, **kwargs)]
+        else:
+            return list(self.ax.barh(x, y, **kwargs))
 
 
-    return plot
+    def _artist_color(self):
+        '''Returns color of the first artist (None if nothing is drawn).'''
 
+        if not self.artists:
+            return None
 
-def visualize_exited_members(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes exited members statistics with matplotlib'''
+        artist = self.artists[0]
+        if isinstance(artist, Line2D):
+            return artist.get_color()
 
-    data = dataset.exited_members(start=start, 
-                                  end=end)
+        # unfilled patches (like steps of histograms) are drawn with edges
+        if isinstance(artist, Patch) and not artist.get_fill():
+            return artist.get_edgecolor()
 
-    x_axis = range(intercept, len(data) + intercept)
+        # collections have one face color for every bar
+        color = artist.get_facecolor()
+        if np.ndim(color) == 2:
+            return tuple(color[0]) if len(color) else None
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+        return color
 
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes exited members statistics with matplotlib from start to end'''
+    def _blit(self, artists:list, x:np.ndarray, y:np.ndarray) -> bool:
+        '''Draws artists over the last drawn axes and returns False if the whole figure has to be redrawn.'''
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+        canvas = self.ax.figure.canvas
+        if not canvas.supports_blit:
+            return False
 
+        # bars start at zero, horizontal bars have values on x axis
+        if self.kind != 'plot':
+            y = np.append(y, 0)
+        if self.kind == 'barh':
+            x, y = y, x
 
-    return plot
+        (x_left, x_right), (y_bottom, y_top) = sorted(self.ax.get_xlim()), sorted(self.ax.get_ylim())
+        if x.min() < x_left or x.max() > x_right or y.min() < y_bottom or y.max() > y_top:
+            return False
 
+        for artist, data in artists:
 
-def visualize_reach(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes reach statistics with matplotlib'''
+            # line is drawn with segment of new values only
+            if data is not None:
+                full = artist.get_data()
+                artist.set_data(*data)
+                self.ax.draw_artist(artist)
+                artist.set_data(*full)
+            else:
+                self.ax.draw_artist(artist)
 
-    data = dataset.reach(start=start, 
-                         end=end)
+        canvas.blit(self.ax.bbox)
 
-    x_axis = range(intercept, len(data) + intercept)
+        return True
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
 
+    def _redraw(self) -> None:
+        '''Updates axes limits and redraws the whole figure.'''
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes reach statistics with matplotlib from start to end'''
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.figure.canvas.draw_idle()
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
 
+def bar_collection(ax, x, height, width=0.8, bottom=0, align:str='center', **kwargs) -> PolyCollection:
+    '''
+    Draws vertical bars as one PolyCollection artist and returns it. 
+    Bars look like bars of ax.bar(), but they are not separate Rectangle artists, 
+    so drawing long series is much faster.
+    Parameters:
+        - ax - matplotlib axes;
+        - x, height - array-like objects with coordinates and heights of bars;
+        - width, bottom, align - the same as in ax.bar();
+        - **kwargs - properties of bars (like color, edgecolor, linewidth, alpha or label);
+    '''
+
+    # preprocessing align argument
+    if align not in ('center', 'edge'):
+        raise ValueError(f"Unknown align: {align}. Available aligns are 'center', 'edge'.")
 
-    return plot
+    # dates and other units are converted to axes coordinates as in ax.bar()
+    ax.xaxis.update_units(x)
+    x = np.asarray(ax.convert_xunits(x), dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+    bottom = np.broadcast_to(np.asarray(bottom, dtype=np.float64), x.shape)
+
+    # color of ax.bar() is color of faces, bars without edges by default
+    if 'color' in kwargs:
+        kwargs.setdefault('facecolor', kwargs.pop('color'))
+    if 'facecolor' not in kwargs:
+        kwargs['facecolor'] = ax._get_patches_for_fill.get_next_color()
+    kwargs.setdefault('edgecolor', 'none')
 
+    left = x - width / 2 if align == 'center' else x
+    right = left + width
+    top = bottom + height
 
-def visualize_reach_subscribers(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes reach subscribers statistics with matplotlib'''
+    # vertices of all bars: (left, bottom), (left, top), (right, top), (right, bottom)
+    vertices = np.empty((len(x), 4, 2))
+    vertices[:, :2, 0] = left[:, None]
+    vertices[:, 2:, 0] = right[:, None]
+    vertices[:, [0, 3], 1] = bottom[:, None]
+    vertices[:, 1:3, 1] = top[:, None]
 
-    data = dataset.reach_subscribers(start=start, 
-                                     end=end)
+    collection = PolyCollection(vertices, **kwargs)
+
+    # bars start at bottom without margin as in ax.bar()
+    if len(bottom):
+        collection.sticky_edges.y.append(bottom.min())
+
+    ax.add_collection(collection)
+    ax.autoscale_view()
+
+    return collection
 
-    x_axis = range(intercept, len(data) + intercept)
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+def downsample(x, y, max_points:int=None) -> tuple:
+    '''
+    Returns (x, y) tuple with at most max_points points of series selected with Largest-Triangle-Three-Buckets algorithm,
+    so peaks of long series stay visible. Series is returned unchanged if max_points is None or series is shorter.
+    Parameters:
+        - x, y - array-like objects with coordinates of points;
+        - max_points:int - maximum number of points (at least 3);
+    '''
+
+    if max_points is None:
+        return x, y
+
+    # preprocessing max_points argument
+    if not isinstance(max_points, int) or max_points < 3:
+        raise ValueError(f'Argument max_points has to be integer greater than 2 (found {max_points}).')
+
+    if len(y) <= max_points:
+        return x, y
+
+    x, y = np.asarray(x), np.asarray(y)
+    x_values, y_values = x.astype(np.float64), y.astype(np.float64)
+
+    # the first and the last points are kept, other points are split to max_points - 2 buckets
+    edges = np.linspace(1, len(y) - 1, max_points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # the last point is not in buckets, so sums are reduced without it
+    x_means = np.add.reduceat(x_values[:edges[-1]], edges[:-1]) / counts
+    y_means = np.add.reduceat(y_values[:edges[-1]], edges[:-1]) / counts
+
+    # the third vertex of triangles is mean of the next bucket (the last point for the last bucket)
+    x_means = np.append(x_means[1:], x_values[-1])
+    y_means = np.append(y_means[1:], y_values[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, len(y) - 1
+
+    # point of every bucket forming the largest triangle with selected point of previous bucket
+    previous = 0
+    for bucket in range(max_points - 2):
+        left, right = edges[bucket], edges[bucket + 1]
+        areas = np.abs((x_values[previous] - x_means[bucket]) * (y_values[left:right] - y_values[previous])
+                       - (x_values[previous] - x_values[left:right]) * (y_means[bucket] - y_values[previous]))
+        previous = left + np.argmax(areas)
+        selected[bucket + 1] = previous
+
+    return x[selected], y[selected]
+
+
+def dashboard(dataset:DataSet, metrics, start=None, end=None, layout:tuple=None, kind:str='plot', figsize:tuple=None, **kwargs):
+    '''
+    Visualizes many metrics on one figure with one panel for every metric and returns matplotlib figure.
+    All series are fetched with one DataSet.matrix() call and the grid of panels is created once.
+    Parameters:
+        - dataset:DataSet - data of VK group;
+        - metrics - list of DataSet method names (like 'views') or tuples with name and key arguments (like ('city', 'Москва'));
+        - start, end - the same as in DataSet methods;
+        - layout:tuple - (rows, columns) of panels (nearly square grid if None);
+        - kind:str - 'plot', 'bar' or 'fastbar' (bars drawn with bar_collection());
+        - figsize:tuple - size of figure in inches (4 x 3 inches for every panel if None);
+        - **kwargs - parameters for ax.plot() or ax.bar();
+    '''
+
+    metrics = list(metrics)
+
+    # preprocessing kind argument
+    if kind not in ('plot', 'bar', 'fastbar'):
+        raise ValueError("kind argument has to have values 'plot', 'bar' or 'fastbar'")
+
+    # preprocessing layout argument
+    if layout is None:
+        columns = max(math.ceil(math.sqrt(len(metrics))), 1)
+        layout = (max(math.ceil(len(metrics) / columns), 1), columns)
+
+    rows, columns = layout
+    if rows * columns < len(metrics):
+        raise ValueError(f'Layout {layout} has less panels than metrics ({rows * columns} vs. {len(metrics)}).')
+
+    # all series aligned to one date axis with one data request, missing days are not drawn
+    dates, matrix = dataset.matrix(metrics, start=start, end=end, fill=np.nan)
 
+    fig, axes = plt.subplots(rows, columns, squeeze=False, sharex=True, 
+                             figsize=figsize or (4 * columns, 3 * rows))
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes reach subscribers statistics with matplotlib from start to end'''
+    for ax, metric, data in zip(axes.flat, metrics, matrix):
 
         if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
+            ax.plot(dates, data, **kwargs)
         elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
+            ax.bar(dates, data, **kwargs)
         else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+            bar_collection(ax, dates, data, **kwargs)
 
+        ax.set_title(metric if isinstance(metric, str) else ' '.join(str(item) for item in metric))
+        ax.tick_params(axis='x', labelrotation=30)
 
-    return plot
+    # panels without metrics are not drawn, so dates are labeled on panels above them
+    for number in range(len(metrics), rows * columns):
+        row, column = divmod(number, columns)
+        axes[row, column].set_visible(False)
+        if row > 0:
+            axes[row - 1, column].tick_params(axis='x', labelbottom=True)
 
+    fig.tight_layout()
 
-def visualize_reach_viral(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes reach viral statistics with matplotlib'''
+    return fig
 
-    data = dataset.reach_viral(start=start, 
-                               end=end)
 
-    x_axis = range(intercept, len(data) + intercept)
+def render_report(data, metrics, out_dir:str, workers:int=None, start=None, end=None, kind:str='plot', 
+                  figsize:tuple=(8, 4), dpi:int=100) -> list:
+    '''
+    Renders one .png file for every metric (and every group of collection) and returns list with paths of files.
+    Figures are rendered with Agg backend by process pool, data is shared with processes 
+    by shared memory blocks, so it is not copied to every process.
+    Parameters:
+        - data - DataSet or DataSetCollection object;
+        - metrics - the same as in plotting.dashboard();
+        - out_dir:str - directory of files (created if it does not exist), 
+          names of files are metric.png for DataSet and group_metric.png for DataSetCollection;
+        - workers:int - number of processes (os.cpu_count() if None, 1 renders files in this process);
+        - start, end - the same as in DataSet methods;
+        - kind:str - 'plot', 'bar' or 'fastbar' (bars drawn with bar_collection());
+        - figsize:tuple - size of every figure in inches;
+        - dpi:int - resolution of files;
+    '''
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+    metrics = list(metrics)
 
+    # preprocessing data argument
+    if isinstance(data, DataSet):
+        groups = {None: data}
+    elif isinstance(data, DataSetCollection):
+        groups = {name: data[name] for name in data.names()}
+    else:
+        raise TypeError(f'Argument data has to be DataSet or DataSetCollection (found {type(data)} type).')
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes reach viral statistics with matplotlib from start to end'''
+    # preprocessing kind argument
+    if kind not in ('plot', 'bar', 'fastbar'):
+        raise ValueError("kind argument has to have values 'plot', 'bar' or 'fastbar'")
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
+    # preprocessing workers argument
+    if workers is not None and (not isinstance(workers, int) or workers <= 0):
+        raise ValueError(f'Argument workers has to be positive integer (found {workers}).')
 
+    os.makedirs(out_dir, exist_ok=True)
 
-    return plot
+    options = {'start': start, 'end': end, 'kind': kind, 'figsize': figsize, 'dpi': dpi}
+    tasks = []
+    for name, dataset in groups.items():
+        for metric in metrics:
+            label = metric if isinstance(metric, str) else '_'.join(str(item) for item in metric)
+            filename = f'{label}.png' if name is None else f'{name}_{label}.png'
+            tasks.append((name, metric, os.path.join(out_dir, filename)))
 
+    # rendering files in this process
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        for name, metric, path in tasks:
+            _render(groups[name], metric, path, options)
+        return [path for _, _, path in tasks]
 
-def visualize_reach_ads(dataset:DataSet, start=None, end=None, intercept=0):
-    '''Visualizes reach ads statistics with matplotlib'''
+    # every group is shared with processes as read-only shared memory block
+    blocks = {}
+    try:
+        for name, dataset in groups.items():
+            blocks[name] = dataset.to_shared_memory()
 
-    data = dataset.reach_ads(start=start, 
-                             end=end)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            arguments = [(blocks[name].name, metric, path, options) for name, metric, path in tasks]
+            paths = list(executor.map(_render_shared, arguments, chunksize=max(len(tasks) // (workers * 4), 1)))
 
-    x_axis = range(intercept, len(data) + intercept)
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
 
-    if not isinstance(intercept, int):
-        raise TypeError('Argument intercept expected to be integer.')
+    return paths
 
 
-    def plot(ax, kind='plot', **kwargs):
-        '''Visualizes reach ads statistics with matplotlib from start to end'''
+# DataSet objects attached by worker process
+_attached = {}
 
-        if kind == 'plot':
-            ax.plot(x_axis, data, **kwargs)
-        elif kind == 'hist':
-            ax.hist(data, **kwargs)
-        elif kind == 'bar':
-            ax.bar(x_axis, data, **kwargs)
-        else:
-            raise ValueError("kind argument has to have values 'plot', 'hist' or 'bar'")
 
+def _init_worker() -> None:
+    '''Initializes worker process of render_report().'''
+
+    # workers never show figures
+    matplotlib.use('Agg', force=True)
+
+    _attached.clear()
+
+
+def _render_shared(arguments:tuple) -> str:
+    '''Renders .png file with DataSet attached to shared memory block and returns path of file.'''
+
+    name, metric, path, options = arguments
+
+    # every block is attached once by every process
+    if name not in _attached:
+        _attached[name] = DataSet.attach(name)
+
+    _render(_attached[name], metric, path, options)
+
+    return path
+
+
+def _render(dataset:DataSet, metric, path:str, options:dict) -> None:
+    '''Renders .png file with one metric of DataSet.'''
+
+    dates, matrix = dataset.matrix([metric], start=options['start'], end=options['end'], fill=np.nan)
+
+    # figure is not registered by pyplot, so it is freed as soon as it is saved
+    fig = Figure(figsize=options['figsize'])
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+
+    if options['kind'] == 'plot':
+        ax.plot(dates, matrix[0])
+    elif options['kind'] == 'bar':
+        ax.bar(dates, matrix[0])
+    else:
+        bar_collection(ax, dates, matrix[0])
+
+    ax.set_title(metric if isinstance(metric, str) else ' '.join(str(item) for item in metric))
+    ax.tick_params(axis='x', labelrotation=30)
+    fig.tight_layout()
 
-    return plot
\ No newline at end of file
+    fig.savefig(path, dpi=options['dpi'])
\ No newline at end of file
@@ -0,0 +1,113 @@
+import functools
+from collections import OrderedDict
+
+import numpy as np
+
+
+class QueryCache:
+    '''
+    LRU cache of query results with limits for number of results and their size in bytes.
+    Cached np.ndarray results are read-only.
+    '''
+
+    def __init__(self, max_size:int=128, max_bytes:int=None) -> None:
+
+        # preprocessing max_size argument
+        if not isinstance(max_size, int) or max_size <= 0:
+            raise ValueError(f'Argument max_size has to be positive integer (found {max_size}).')
+
+        # preprocessing max_bytes argument
+        if max_bytes is not None and (not isinstance(max_bytes, int) or max_bytes <= 0):
+            raise ValueError(f'Argument max_bytes has to be positive integer (found {max_bytes}).')
+
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+
+        # results ordered from least to most recently used
+        self._results = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key):
+        '''Returns cached result for key or None if key is not cached.'''
+
+        if key in self._results:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return self._results[key]
+
+        self.misses += 1
+        return None
+
+
+    def put(self, key, result:np.ndarray) -> np.ndarray:
+        '''
+        Caches result for key and returns cached read-only result. 
+        Least recently used results are dropped when limits are exceeded.
+        '''
+
+        # results larger than the cache are not cached
+        if self.max_bytes is not None and result.nbytes > self.max_bytes:
+            return result
+
+        # cached results are shared by callers
+        if result.flags.writeable:
+            result = result.view()
+            result.flags.writeable = False
+
+        if key in self._results:
+            self._bytes -= self._results.pop(key).nbytes
+
+        self._results[key] = result
+        self._bytes += result.nbytes
+
+        while len(self._results) > self.max_size or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            self._bytes -= self._results.popitem(last=False)[1].nbytes
+
+        return result
+
+
+    def clear(self) -> None:
+        '''Drops all cached results.'''
+
+        self._results.clear()
+        self._bytes = 0
+
+
+    def info(self) -> dict:
+        '''Returns dict with hits, misses, size and bytes of the cache.'''
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._results),
+                'bytes': self._bytes,
+                'max_size': self.max_size,
+                'max_bytes': self.max_bytes}
+
+
+def cached(method):
+    '''Decorator of DataSet methods caching their results in DataSet's QueryCache (if it is enabled).'''
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+
+        cache = self._query_cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+
+        # unhashable arguments are not cached
+        try:
+            result = cache.get(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+
+        if result is None:
+            result = cache.put(key, method(self, *args, **kwargs))
+
+        return result
+
+    return wrapper
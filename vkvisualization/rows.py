@@ -0,0 +1,113 @@
+import pandas as pd
+import numpy as np
+
+
+class RowBuffer:
+    '''
+    Growable columns of date-sorted DataSet rows in VK export format.
+    Columns are copied to arrays with spare capacity (doubled when rows don't fit),
+    so rows appended to the end are written in place and DataFrame of rows is made of views of arrays.
+    Categorical columns are stored as codes with categories extended by new rows.
+    '''
+
+    def __init__(self, df:pd.DataFrame) -> None:
+
+        self._length = len(df)
+
+        # dict with column names and arrays of values (codes for categorical columns)
+        self._arrays = {}
+
+        # dicts with names of categorical columns and their categories and codes of categories
+        self._categories = {}
+        self._lookups = {}
+
+        for column in ('Дата', 'Критерий', 'Парам. №1', 'Парам. №2', 'Значение'):
+            values = df[column].array
+            if isinstance(values, pd.Categorical):
+                self._categories[column] = values.categories
+                self._lookups[column] = {category: code for code, category in enumerate(values.categories)}
+                self._arrays[column] = values.codes
+            else:
+                self._arrays[column] = df[column].values
+
+        # columns of DataFrame are not written in place, they are copied to own arrays on the first write
+        self._owned = set()
+
+
+    def holds(self, df:pd.DataFrame) -> bool:
+        '''Returns True if rows of DataFrame are rows of the buffer (DataFrame was not changed in place).'''
+        return len(df) == self._length and np.may_share_memory(df['Дата'].values, self._arrays['Дата'])
+
+
+    def replace(self, left:int, tail:pd.DataFrame) -> None:
+        '''
+        Replaces rows from left with rows of tail DataFrame.
+        Rows are written in place if they fit and rows of previous DataFrames don't change,
+        otherwise columns are copied to arrays with doubled capacity.
+        '''
+
+        length = left + len(tail)
+
+        # new values of every column, codes are mapped to categories of the buffer
+        columns = {}
+        for column, array in self._arrays.items():
+            values = tail[column].array
+            if column in self._categories:
+                lookup = self._lookups[column]
+                new = [category for category in values.categories if category not in lookup]
+                if new:
+                    lookup.update({category: code for code, category in enumerate(new, len(lookup))})
+                    self._categories[column] = self._categories[column].append(pd.Index(new))
+
+                # missing values have code -1, so the last code of mapping is -1
+                mapping = np.array([lookup[category] for category in values.categories] + [-1], dtype=np.int64)
+                columns[column] = mapping[values.codes].astype(_codes_dtype(len(lookup)))
+            else:
+                columns[column] = tail[column].values
+
+        # rows from left to the current length are visible in previous DataFrames
+        visible = self._length - left
+        copied = any(length > len(array) or column not in self._owned
+                     or np.result_type(array.dtype, columns[column].dtype) != array.dtype
+                     or not _same(array[left:self._length], columns[column][:visible])
+                     for column, array in self._arrays.items())
+
+        for column, values in columns.items():
+            array = self._arrays[column]
+            if copied:
+                grown = np.empty(max(2 * length, 1), dtype=np.result_type(array.dtype, values.dtype))
+                grown[:left] = array[:left]
+                self._arrays[column] = array = grown
+                self._owned.add(column)
+            array[left:length] = values
+
+        self._length = length
+
+
+    def to_frame(self) -> pd.DataFrame:
+        '''Returns DataFrame with views of rows' columns.'''
+
+        columns = {}
+        for column, array in self._arrays.items():
+            values = array[:self._length]
+            if column in self._categories:
+                dtype = pd.CategoricalDtype(self._categories[column])
+                values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+            columns[column] = values
+
+        return pd.DataFrame(columns, index=pd.RangeIndex(self._length), copy=False)
+
+
+def _codes_dtype(count:int) -> np.dtype:
+    '''Returns dtype of codes of pd.Categorical with count categories, so codes are not cast by pandas.'''
+
+    for dtype in (np.int8, np.int16, np.int32):
+        if count < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+
+    return np.dtype(np.int64)
+
+
+def _same(old:np.ndarray, new:np.ndarray) -> bool:
+    '''Returns True if arrays have equal values (np.nan is equal to np.nan).'''
+    return len(old) == len(new) and np.array_equal(old, new, equal_nan=old.dtype.kind == 'f' and new.dtype.kind == 'f')
@@ -0,0 +1,110 @@
+import json
+from multiprocessing import shared_memory
+
+import pandas as pd
+import numpy as np
+
+from vkvisualization.index import SeriesIndex
+
+
+# alignment of every array in shared memory block
+ALIGNMENT = 64
+
+# size of header length at the beginning of shared memory block
+HEADER_SIZE = 8
+
+
+def create(series_index:SeriesIndex) -> shared_memory.SharedMemory:
+    '''
+    Returns shared memory block with dates, values and key codes of all series.
+    Parameters:
+        - series_index:SeriesIndex - series to share;
+    '''
+
+    keys = series_index.keys()
+    columns = series_index.to_columns()
+
+    arrays = {'Дата': columns['Дата'].astype('datetime64[ns]'),
+              'Значение': columns['Значение']}
+
+    # object values cannot be shared without pickle
+    if arrays['Значение'].dtype == object:
+        arrays['Значение'] = arrays['Значение'].astype(np.float64)
+
+    categories = {}
+    for column in ('Критерий', 'Парам. №1', 'Парам. №2'):
+        arrays[column] = columns[column].codes
+        categories[column] = [str(category) for category in columns[column].categories]
+
+    # offsets of arrays after header
+    layout, offset = {}, 0
+    for column, array in arrays.items():
+        layout[column] = {'offset': offset, 'dtype': array.dtype.str, 'length': len(array)}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({'layout': layout,
+                         'categories': categories,
+                         'lengths': [len(series_index.get(*key)[0]) for key in keys]}).encode('utf-8')
+    start = -(-(HEADER_SIZE + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    block = shared_memory.SharedMemory(create=True, size=max(start + offset, 1))
+
+    # writing header and arrays to shared memory block
+    block.buf[:HEADER_SIZE] = len(header).to_bytes(HEADER_SIZE, 'little')
+    block.buf[HEADER_SIZE:HEADER_SIZE + len(header)] = header
+    for column, array in arrays.items():
+        _view(block, start, layout[column])[:] = array
+
+    return block
+
+
+def attach(name:str) -> tuple:
+    '''
+    Returns (block, frame, series_index) tuple for shared memory block created with create().
+    Frame columns and series are views of shared memory block, so block must be kept open while they are used.
+    Parameters:
+        - name:str - name of shared memory block;
+    '''
+
+    # the block is owned by the creating process, so it must not be tracked by this one
+    # (before Python 3.13 it is tracked by resource tracker shared with the creating process)
+    try:
+        block = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        block = shared_memory.SharedMemory(name=name)
+
+    # reading header
+    header_length = int.from_bytes(bytes(block.buf[:HEADER_SIZE]), 'little')
+    header = json.loads(bytes(block.buf[HEADER_SIZE:HEADER_SIZE + header_length]).decode('utf-8'))
+    start = -(-(HEADER_SIZE + header_length) // ALIGNMENT) * ALIGNMENT
+
+    arrays = {}
+    for column, layout in header['layout'].items():
+        arrays[column] = _view(block, start, layout)
+
+        # shared arrays are read-only for all processes
+        arrays[column].flags.writeable = False
+
+    columns = {'Дата': arrays['Дата']}
+    for column, categories in header['categories'].items():
+        dtype = pd.CategoricalDtype(categories)
+        columns[column] = pd.Categorical.from_codes(arrays[column], dtype=dtype, validate=False)
+    columns['Значение'] = arrays['Значение']
+
+    frame = pd.DataFrame(columns, copy=False)
+
+    # slicing series in the same order as they were written
+    bounds = np.concatenate(([0], np.cumsum(header['lengths'], dtype=np.int64)))
+    series = {}
+    for number in range(len(header['lengths'])):
+        row = bounds[number]
+        key = tuple(None if columns[column].codes[row] < 0 else header['categories'][column][columns[column].codes[row]]
+                    for column in ('Критерий', 'Парам. №1', 'Парам. №2'))
+        series[key] = (arrays['Дата'][row:bounds[number + 1]], arrays['Значение'][row:bounds[number + 1]])
+
+    return block, frame, SeriesIndex(series)
+
+
+def _view(block:shared_memory.SharedMemory, start:int, layout:dict) -> np.ndarray:
+    '''Returns np.ndarray view of shared memory block.'''
+    return np.ndarray((layout['length'],), dtype=np.dtype(layout['dtype']), buffer=block.buf, offset=start + layout['offset'])